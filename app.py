@@ -2,15 +2,26 @@
 
 import os
 import json
+import re
+import time
 # from flask import Flask, render_template, request, jsonify
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, render_template, request, jsonify, session, g, send_file
 from dotenv import load_dotenv
 from main import DRIForesightProcessor, initialize_processor
 # from policy_stress_test import create_stress_test_processor
+from policy_stress_test import PolicyStressTestProcessor
+from checkpoint_store import CheckpointStore
+from llm_ledger import get_default_ledger, set_call_tags, reset_call_tags
+from metrics import REGISTRY, HTTP_IN_FLIGHT, HTTP_REQUESTS, HTTP_REQUEST_SECONDS
+from pretranslation import Pretranslator, ProjectLanguageSettings, valid_language_code
+from request_profiler import get_default_profiler
+from structured_logging import get_logger, new_request_id, reset_request_id, set_request_id
+from translation_cache import get_default_translation_cache
+from translation_schemas import TRANSLATION_SCHEMAS
+from translation_service import TranslationManager, shared_client
 # from google.cloud import translate_v3
 import os
 
-from deep_translator import GoogleTranslator
 
 load_dotenv()
 # processor = None
@@ -26,6 +37,117 @@ def create_app() -> Flask:
         processor = None
         app.logger.error(f"Failed to initialize DRIForesightProcessor: {exc}")
 
+    # Stress test runs are checkpointed so edited artifacts only recompute what depends on them
+    stress_tester = None
+    if processor is not None:
+        stress_tester = PolicyStressTestProcessor(
+            processor, checkpoint_store=CheckpointStore(os.getenv("STRESS_TEST_CHECKPOINT_DIR", "checkpoints"))
+        )
+
+    def save_to_stress_test_run(run_id: str, stage_name: str, output) -> list:
+        """Store an edited artifact in a checkpointed run; returns the stages it invalidated."""
+        if stress_tester is None:
+            raise ValueError("Server not initialized. Check GROQ_API_KEY.")
+        return stress_tester.update_stage_output(run_id, stage_name, output)
+
+    profiler = get_default_profiler()
+    translation_cache = get_default_translation_cache()
+    # TRANSLATION_SERVICE=offline swaps in the local stand-in provider for air-gapped tests and benchmarks
+    translation_manager = TranslationManager(service_type=os.getenv("TRANSLATION_SERVICE", "free"),
+                                             cache=translation_cache)
+    # Projects that opt in get scenario and wind tunnel output translated as soon as it is generated
+    pretranslator = Pretranslator(
+        translation_manager,
+        ProjectLanguageSettings(os.getenv("PROJECT_SETTINGS_PATH", "project_settings.json") or None)
+    )
+
+    def queue_pretranslation(response: dict, project: str, artifact: str, output) -> dict:
+        """Add the background translation ticket to a generation response when the project opted in."""
+        ticket = pretranslator.queue(project, artifact, output)
+        if ticket is not None:
+            response['pretranslation'] = ticket
+        return response
+
+    log = get_logger("api")
+
+    @app.before_request
+    def assign_request_id():
+        """Correlate this request's log records; a well-formed incoming X-Request-ID is reused."""
+        request_id = request.headers.get("X-Request-ID", "")
+        if not re.fullmatch(r"[\w.-]{1,64}", request_id):
+            request_id = new_request_id()
+        g.request_id = request_id
+        g.request_id_token = set_request_id(request_id)
+
+    @app.after_request
+    def add_request_id_header(response):
+        if "request_id" in g:
+            response.headers["X-Request-ID"] = g.request_id
+        return response
+
+    @app.teardown_request
+    def clear_request_id(exc):
+        token = g.pop("request_id_token", None)
+        if token is not None:
+            reset_request_id(token)
+
+    @app.before_request
+    def start_profiling():
+        """Sample this request's stack when an admin asks for it with X-Profile or ?profile=1."""
+        if profiler.flagged(request.args, request.headers) and profiler.is_admin(request.headers):
+            g.profile_sampler = profiler.start()
+
+    @app.after_request
+    def save_profile(response):
+        sampler = g.pop("profile_sampler", None)
+        if sampler is not None:
+            response.headers["X-Profile-Id"] = profiler.save(sampler, request.method, request.path,
+                                                              response.status_code)
+        return response
+
+    @app.teardown_request
+    def stop_profiling(exc):
+        # Only reached with a sampler when after_request was skipped; don't leave it running
+        sampler = g.pop("profile_sampler", None)
+        if sampler is not None:
+            sampler.stop()
+
+    @app.before_request
+    def start_request_metrics():
+        # Label by URL rule rather than path so unknown paths can't create unbounded series
+        g.metrics_route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        g.request_started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(g.metrics_route)
+
+    @app.after_request
+    def record_request_metrics(response):
+        route = g.get("metrics_route")
+        if route is not None:
+            HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_started, route, request.method)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        route = g.pop("metrics_route", None)
+        if route is not None:
+            HTTP_IN_FLIGHT.dec(route)
+
+    @app.before_request
+    def tag_llm_calls():
+        """Attribute every LLM call made while serving this request to its route and project."""
+        payload = request.get_json(silent=True) if request.is_json else None
+        payload = payload if isinstance(payload, dict) else {}
+        project = (payload.get("project_name") or request.form.get("project_name")
+                   or payload.get("domain") or request.form.get("domain") or request.form.get("final_domain"))
+        g.llm_tags_token = set_call_tags(route=request.path, project=project)
+
+    @app.teardown_request
+    def untag_llm_calls(exc):
+        token = g.pop("llm_tags_token", None)
+        if token is not None:
+            reset_call_tags(token)
+
     class FlaskFileWrapper:
         """Adapter to make Werkzeug's FileStorage look like our expected file object."""
  
@@ -55,6 +177,70 @@ def create_app() -> Flask:
         ok = processor is not None and bool(os.getenv("GROQ_API_KEY"))
         return jsonify({"ok": ok})
 
+    @app.route("/api/metrics", methods=["GET"])
+    def prometheus_metrics():
+        """Prometheus text exposition of request, LLM, cache, job, pool and upload metrics"""
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.route("/api/profiles", methods=["GET"])
+    def list_profiles():
+        """Stored request profiles (admin only)"""
+        if not profiler.is_admin(request.headers):
+            return jsonify({"error": "Admin token required"}), 403
+        return jsonify({"profiles": profiler.list()})
+
+    @app.route("/api/profiles/<profile_id>", methods=["GET"])
+    def download_profile(profile_id):
+        """Collapsed-stack profile for flamegraph.pl or speedscope (admin only)"""
+        if not profiler.is_admin(request.headers):
+            return jsonify({"error": "Admin token required"}), 403
+        path = profiler.path(profile_id)
+        if path is None:
+            return jsonify({"error": "Profile not found"}), 404
+        return send_file(os.path.abspath(path), mimetype="text/plain", as_attachment=True,
+                         download_name=f"{profile_id}.folded")
+
+    @app.route("/api/translation-cache", methods=["GET"])
+    def translation_cache_stats():
+        """Hit rates and size of the translation memory"""
+        return jsonify(translation_cache.stats())
+
+    @app.route("/api/projects/<path:project_name>/languages", methods=["GET", "PUT"])
+    def project_languages(project_name):
+        """Read or replace a project's preferred languages for background pre-translation"""
+        if request.method == "PUT":
+            payload = request.get_json(silent=True) or {}
+            languages = payload.get("preferred_languages")
+            if not isinstance(languages, list) or not all(valid_language_code(lang) for lang in languages):
+                return jsonify({"error": '"preferred_languages" must be a list of two-letter language codes'}), 400
+            pretranslator.settings.set(project_name, languages)
+        return jsonify({"project_name": project_name,
+                        "preferred_languages": pretranslator.settings.get(project_name)})
+
+    @app.route("/api/pretranslations/<artifact_id>", methods=["GET"])
+    def get_pretranslation(artifact_id):
+        """A background translation of a generated artifact: 200 when ready, 202 while pending"""
+        language = request.args.get("language", "lo")
+        entry = pretranslator.get(artifact_id, language)
+        if entry is None:
+            return jsonify({"error": "No background translation for this artifact and language"}), 404
+        entry.update(artifact_id=artifact_id, language=language)
+        status = {"ready": 200, "pending": 202}.get(entry["status"], 500)
+        return jsonify(entry), status
+
+    @app.route("/api/llm-usage", methods=["GET"])
+    def llm_usage():
+        """Token, latency and cost totals from the LLM call ledger"""
+        ledger = processor.ledger if processor is not None else get_default_ledger()
+        group_by = request.args.get("group_by", "operation")
+        if group_by not in ("operation", "route", "project", "model"):
+            return jsonify({"error": "group_by must be operation, route, project or model"}), 400
+        return jsonify({
+            "group_by": group_by,
+            "summary": ledger.summary(group_by),
+            "recent_calls": ledger.records(limit=request.args.get("limit", 50, type=int))
+        })
+
     @app.route("/api/generate-domain-map", methods=["POST"])
     def generate_domain_map():
         if processor is None:
@@ -269,14 +455,19 @@ def create_app() -> Flask:
             if not domain:
                 return jsonify({"error": "Missing domain"}), 400
             
-            # Here you can save to database/file if needed
-            # For now, just return success
-            return jsonify({
+            response = {
                 "success": True, 
                 "message": "STEEPV analysis saved successfully",
                 "saved_data": steepv_data
-            })
-            
+            }
+            # Edits to a stress test run invalidate only the stages downstream of STEEPV
+            run_id = payload.get("run_id")
+            if run_id:
+                response["stale_stages"] = save_to_stress_test_run(run_id, "steepv", steepv_data)
+            return jsonify(response)
+            
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
@@ -291,17 +482,65 @@ def create_app() -> Flask:
             if not domain:
                 return jsonify({"error": "Missing domain"}), 400
             
-            # Here you can save to database/file if needed
-            # For now, just return success
-            return jsonify({
+            response = {
                 "success": True, 
                 "message": "Futures Triangle saved successfully",
                 "saved_data": futures_triangle_data
-            })
+            }
+            run_id = payload.get("run_id")
+            if run_id:
+                response["stale_stages"] = save_to_stress_test_run(run_id, "futures_triangle", futures_triangle_data)
+            return jsonify(response)
             
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             return jsonify({"error": str(e)}), 500
 
+    @app.route("/api/stress-test", methods=["POST"])
+    def run_stress_test():
+        """Run the full stress test pipeline as a checkpointed run"""
+        if stress_tester is None:
+            return jsonify({"error": "Server not initialized. Check GROQ_API_KEY."}), 500
+
+        domain = request.form.get("domain", "").strip()
+        project_name = request.form.get("project_name", "").strip() or domain
+        if not domain:
+            return jsonify({"error": "Missing domain"}), 400
+
+        documents = [FlaskFileWrapper(f) for f in request.files.getlist("documents")]
+        document_text = processor.extract_comprehensive_text({"documents": documents}) if documents else ""
+
+        results = stress_tester.run_comprehensive_analysis(domain, project_name, document_text)
+        return jsonify(results)
+
+    @app.route("/api/stress-test/stale-stages", methods=["POST"])
+    def stress_test_stale_stages():
+        """List the stages of a run that edits have invalidated"""
+        if stress_tester is None:
+            return jsonify({"error": "Server not initialized. Check GROQ_API_KEY."}), 500
+        run_id = (request.get_json(silent=True) or {}).get("run_id", "")
+        try:
+            return jsonify({"run_id": run_id, "stale_stages": stress_tester.stale_stages(run_id)})
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    @app.route("/api/recompute-stale", methods=["POST"])
+    def recompute_stale():
+        """Recompute only the invalidated stages of a run; everything else is restored"""
+        if stress_tester is None:
+            return jsonify({"error": "Server not initialized. Check GROQ_API_KEY."}), 500
+        run_id = (request.get_json(silent=True) or {}).get("run_id", "")
+        try:
+            results = stress_tester.resume_comprehensive_analysis(run_id)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        timings = results.get("stage_timings", {})
+        results["recomputed_stages"] = [name for name, t in timings.items() if t.get("status") == "completed"]
+        results["restored_stages"] = [name for name, t in timings.items() if t.get("status") == "restored"]
+        return jsonify(results)
+
     # ADD: New Flask route for saving Phase 1 progress
 
     @app.route("/api/save-phase1-progress", methods=["POST"])
@@ -408,10 +647,10 @@ def create_app() -> Flask:
             if 'error' in baseline:
                 return jsonify({'error': baseline['error']}), 500
             
-            return jsonify({
+            return jsonify(queue_pretranslation({
                 'success': True,
                 'baseline_scenario': baseline
-            })
+            }, data.get('project_name') or domain, 'baseline_scenario', baseline))
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -500,10 +739,10 @@ def create_app() -> Flask:
             if 'error' in scenarios:
                 return jsonify({'error': scenarios['error']}), 500
             
-            return jsonify({
+            return jsonify(queue_pretranslation({
                 'success': True,
                 'alternative_scenarios': scenarios
-            })
+            }, data.get('project_name') or domain, 'alternative_scenarios', scenarios))
             
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -566,12 +805,12 @@ def create_app() -> Flask:
             if 'error' in wind_tunnel_results:
                 return jsonify({'error': wind_tunnel_results['error']}), 500
 
-            return jsonify({
+            return jsonify(queue_pretranslation({
                 'success': True,
                 'wind_tunnel_analysis': wind_tunnel_results,
                 'analyzed_files': [f.filename for f in policy_files],
                 'policy_text_length': len(policy_text)
-            })
+            }, project_name or domain, 'wind_tunnel', wind_tunnel_results))
 
         except Exception as e:
             app.logger.error(f"Wind Tunnel analysis error: {str(e)}")
@@ -579,21 +818,22 @@ def create_app() -> Flask:
 
 # for translation
     def create_translation_service():
-        """Initialize Google Cloud Translation service"""
+        """Google Cloud Translation service client, created once per process and then reused"""
         try:
+            from google.cloud import translate_v3
+
             # Set your project ID
             project_id = "bsai-472610"  # Replace with your project ID
             
             # Make sure your Key.json is in the same directory as app.py
-            app_path = os.path.dirname(__file__)
-            os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = f"{app_path}/Key.json"
-            
-            client = translate_v3.TranslationServiceClient()
+            key_path = os.path.join(os.path.dirname(__file__), "Key.json")
+            client = shared_client(("google_cloud_v3", key_path),
+                                   lambda: translate_v3.TranslationServiceClient.from_service_account_file(key_path))
             parent = f"projects/{project_id}/locations/global"
             
             return client, parent
         except Exception as e:
-            print(f"Translation service initialization failed: {e}")
+            log.error("Translation service initialization failed", extra={"error": str(e)})
             return None, None
 
     # Add this new route
@@ -643,12 +883,10 @@ def create_app() -> Flask:
             target_language = data.get('target_language', 'lo')
             source_language = data.get('source_language', 'en')
             
-            print(f"\n{'='*60}")
-            print(f"[TRANSLATE API CALL]")
-            print(f"  Source: {source_language} → Target: {target_language}")
-            print(f"  Text length: {len(text)} chars")
-            print(f"  Text: {text[:100]}..." if len(text) > 100 else f"  Text: {text}")
-            print(f"{'='*60}")
+            log.info("Translate request", extra={
+                "source_language": source_language, "target_language": target_language,
+                "text_length": len(text), "sample_key": "translate_request"
+            })
             
             if not text:
                 return jsonify({'error': 'No text provided'}), 400
@@ -662,7 +900,8 @@ def create_app() -> Flask:
             try:
                 # Check if already target language
                 if target_language == source_language:
-                    print(f"[SKIP] Source and target are same language: {source_language}")
+                    log.debug("Translate skipped: source and target language are the same",
+                              extra={"language": source_language})
                     return jsonify({
                         'success': True,
                         'original_text': text,
@@ -671,29 +910,90 @@ def create_app() -> Flask:
                         'source_language': source_language
                     })
                 
-                translated_text = GoogleTranslator(
-                    source=source_language,
-                    target=target_language
-                ).translate(text)
+                # Sentences already in the cache are reused; only new or edited ones go to the
+                # shared translation pool (rate limited per provider, retried when throttled)
+                segment_stats = {}
+                translated_text = translation_manager.translate_batch(
+                    [text], source_language, target_language, strict=True, stats=segment_stats
+                )[0]
                 
-                print(f"[SUCCESS] Translated text: {translated_text[:100]}..." if len(translated_text) > 100 else f"[SUCCESS] Translated text: {translated_text}")
+                log.info("Translate completed", extra={
+                    "translated_length": len(translated_text), "segments": segment_stats['segments'],
+                    "cached_segments": segment_stats['cached_segments'], "sample_key": "translate_completed"
+                })
                 
                 return jsonify({
                     'success': True,
                     'original_text': text,
                     'translated_text': translated_text,
                     'target_language': target_language,
-                    'source_language': source_language
+                    'source_language': source_language,
+                    'cached': segment_stats['cached_segments'] == segment_stats['segments'],
+                    'segments': segment_stats['segments'],
+                    'cached_segments': segment_stats['cached_segments']
                 })
                 
             except Exception as e:
-                print(f"[ERROR] Translation failed: {str(e)}")
+                log.error("Translation failed", extra={"error": str(e)})
                 return jsonify({'error': f'Translation failed: {str(e)}'}), 500
                 
         except Exception as e:
-            print(f"[ERROR] Request processing failed: {str(e)}")
+            log.error("Translate request processing failed", extra={"error": str(e)})
             return jsonify({'error': f'Request processing failed: {str(e)}'}), 500
 
+    @app.route('/api/translate/batch', methods=['POST'])
+    def translate_batch():
+        """Translate a list of strings ("texts") or the prose strings of a JSON "document" in one call.
+
+        Naming the document's "artifact" (e.g. "baseline_scenario") translates only the fields
+        its translation schema marks as prose and adds "labels" for its fixed-vocabulary values.
+        Without it, ids, timeframes and known fixed-vocabulary values are left as generated.
+        """
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON body'}), 400
+
+        target_language = data.get('target_language', 'lo')
+        source_language = data.get('source_language', 'en')
+        if not isinstance(target_language, str) or len(target_language) != 2:
+            return jsonify({'error': 'Invalid target language code'}), 400
+        if not isinstance(source_language, str) or len(source_language) != 2:
+            return jsonify({'error': 'Invalid source language code'}), 400
+
+        texts = data.get('texts')
+        has_document = 'document' in data
+        if texts is None and not has_document:
+            return jsonify({'error': 'Provide "texts" (a list of strings) or "document" (any JSON value)'}), 400
+        if texts is not None and (not isinstance(texts, list) or not all(isinstance(t, str) for t in texts)):
+            return jsonify({'error': '"texts" must be a list of strings'}), 400
+        artifact = data.get('artifact')
+        if artifact is not None and artifact not in TRANSLATION_SCHEMAS:
+            return jsonify({'error': f'Unknown artifact; expected one of: {", ".join(sorted(TRANSLATION_SCHEMAS))}'}), 400
+
+        response = {
+            'success': True,
+            'target_language': target_language,
+            'source_language': source_language
+        }
+        try:
+            if texts is not None:
+                response['translations'] = (list(texts) if source_language == target_language else
+                                            translation_manager.translate_batch(texts, source_language, target_language))
+            if has_document:
+                response['document'] = (data['document'] if source_language == target_language else
+                                        translation_manager.translate_document(data['document'], source_language,
+                                                                               target_language, artifact=artifact))
+                if artifact is not None:
+                    vocabulary = translation_manager.document_vocabulary(data['document'], artifact)
+                    response['labels'] = (
+                        {value: value for value in vocabulary} if source_language == target_language or not vocabulary
+                        else translation_manager.vocabulary_labels(source_language, target_language, vocabulary)
+                    )
+        except Exception as e:
+            log.error("Batch translation failed", extra={"error": str(e)})
+            return jsonify({'error': f'Translation failed: {str(e)}'}), 500
+        return jsonify(response)
+
     # @app.route('/api/translate', methods=['POST'])
     # def translate_text_free():
     #     """Translate text using free Google Translate via deep_translator"""
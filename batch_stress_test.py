@@ -0,0 +1,250 @@
+"""
+Run the policy stress test over many domains/projects from a manifest.
+
+    python batch_stress_test.py projects.jsonl --output results.jsonl
+    python batch_stress_test.py projects.csv --output results_parquet --format parquet --max-projects 4
+
+Manifest rows need domain, project_name and documents (a list in JSONL, ";"-separated paths in
+CSV); project_id is optional and defaults to a hash of the domain, project name and document
+contents. All projects share one processor, so they draw on a single rate-limit budget. Each
+result is written as soon as its project finishes, and re-running the same command skips
+completed projects and resumes partial ones from their stage checkpoints.
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Set
+
+from checkpoint_store import CheckpointStore
+from metrics import PoolTracker
+from policy_stress_test import PolicyStressTestProcessor
+from stage_graph import content_hash
+
+
+def document_signatures(paths: List[str]) -> List[List[str]]:
+    """(basename, content hash) per document, so a document edited in place gets a new project id."""
+    signatures = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            # Reported when the project runs; the id only needs to be stable until then
+            digest = None
+        signatures.append([os.path.basename(path), digest])
+    return signatures
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Read manifest rows from a .jsonl or .csv file."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            row["documents"] = [p.strip() for p in (row.get("documents") or "").split(";") if p.strip()]
+    else:
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+
+    projects = []
+    for line_no, row in enumerate(rows, start=1):
+        domain = (row.get("domain") or "").strip()
+        if not domain:
+            raise ValueError(f"Manifest row {line_no} is missing a domain")
+        documents = row.get("documents") or []
+        if isinstance(documents, str):
+            documents = [documents]
+        project_name = (row.get("project_name") or "").strip() or domain
+        projects.append({
+            "project_id": str(row.get("project_id") or "").strip()
+                          or content_hash([domain, project_name, document_signatures(documents)])[:16],
+            "domain": domain,
+            "project_name": project_name,
+            "documents": documents
+        })
+
+    ids = [project["project_id"] for project in projects]
+    if len(ids) != len(set(ids)):
+        raise ValueError("Manifest contains duplicate projects")
+    return projects
+
+
+class JsonlResultWriter:
+    """Append one JSON line per finished project."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def completed_projects(self) -> Set[str]:
+        completed = set()
+        if not os.path.exists(self.path):
+            return completed
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash; that project simply runs again
+                    continue
+                if record.get("processing_status") == "completed":
+                    completed.add(record.get("project_id"))
+        return completed
+
+    def write(self, record: Dict[str, Any]):
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+
+
+class ParquetResultWriter:
+    """Write each finished project as its own part file in a Parquet dataset directory.
+
+    Part files are never rewritten, so a crash can only lose the project being written, and the
+    directory reads back as one table with pandas.read_parquet(path).
+    """
+
+    def __init__(self, path: str):
+        import pyarrow  # noqa: F401 - fail fast before any project is run
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def completed_projects(self) -> Set[str]:
+        import pyarrow.parquet as pq
+        completed = set()
+        for name in os.listdir(self.path):
+            if name.endswith(".parquet"):
+                table = pq.read_table(os.path.join(self.path, name), columns=["project_id", "processing_status"])
+                for row in table.to_pylist():
+                    if row["processing_status"] == "completed":
+                        completed.add(row["project_id"])
+        return completed
+
+    def write(self, record: Dict[str, Any]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        row = {key: record.get(key) for key in ("project_id", "domain", "project_name", "processing_status",
+                                                "error", "failed_stage", "duration_seconds", "finished_at")}
+        row["results"] = json.dumps(record.get("results"), ensure_ascii=False)
+        table = pa.Table.from_pylist([row], schema=pa.schema([
+            ("project_id", pa.string()), ("domain", pa.string()), ("project_name", pa.string()),
+            ("processing_status", pa.string()), ("error", pa.string()), ("failed_stage", pa.string()),
+            ("duration_seconds", pa.float64()), ("finished_at", pa.float64()), ("results", pa.string())
+        ]))
+        part = os.path.join(self.path, f"{record['project_id']}-{int(record['finished_at'] * 1000)}.parquet")
+        pq.write_table(table, f"{part}.tmp")
+        os.replace(f"{part}.tmp", part)
+
+
+def read_documents(processor, paths: List[str]) -> str:
+    """Extract text from local files the same way uploaded documents are handled."""
+    files = []
+    for path in paths:
+        with open(path, "rb") as f:
+            buffer = io.BytesIO(f.read())
+        # Name by basename so the document text (and checkpoint fingerprint) doesn't depend on the directory
+        buffer.name = os.path.basename(path)
+        files.append(buffer)
+    return processor.extract_comprehensive_text({"documents": files}) if files else ""
+
+
+def run_project(stress_tester: PolicyStressTestProcessor, project: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.time()
+    record = {
+        "project_id": project["project_id"],
+        "domain": project["domain"],
+        "project_name": project["project_name"]
+    }
+    try:
+        document_text = read_documents(stress_tester.processor, project["documents"])
+        # The project id doubles as run id, so an interrupted project resumes from its checkpoints
+        results = stress_tester.run_comprehensive_analysis(
+            project["domain"], project["project_name"], document_text, run_id=project["project_id"]
+        )
+        record["processing_status"] = results.get("processing_status")
+        record["error"] = results.get("error")
+        if record["processing_status"] == "completed":
+            # Generation errors come back as {"error": ...} outputs, which are never checkpointed
+            # Checked against this run's inputs, not whatever manifest is stored under the id
+            failed_stages = stress_tester.stale_stages(project["project_id"], {
+                "domain": project["domain"],
+                "project_name": project["project_name"],
+                "document_text": document_text
+            })
+            if failed_stages:
+                record["processing_status"] = "incomplete"
+                record["error"] = f"Stages returned errors: {', '.join(failed_stages)}"
+        record["failed_stage"] = results.get("failed_stage")
+        record["results"] = results
+    except Exception as e:
+        record["processing_status"] = "error"
+        record["error"] = str(e)
+        record["failed_stage"] = None
+        record["results"] = None
+    record["finished_at"] = time.time()
+    record["duration_seconds"] = round(record["finished_at"] - started, 3)
+    return record
+
+
+def run_batch(stress_tester: PolicyStressTestProcessor, projects: List[Dict[str, Any]], writer,
+              max_projects: int = 2) -> Dict[str, int]:
+    """Run every project not yet completed in the output, at most max_projects at a time."""
+    completed = writer.completed_projects()
+    todo = [project for project in projects if project["project_id"] not in completed]
+    summary = {"total": len(projects), "skipped": len(projects) - len(todo), "completed": 0, "failed": 0}
+    print(f"Batch stress test: {len(todo)} to run, {summary['skipped']} already completed")
+
+    workers = max(1, max_projects)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="project") as pool, \
+            PoolTracker("batch_project", workers) as tracker:
+        futures = {}
+        for project in todo:
+            tracker.submitted()
+            futures[pool.submit(tracker.run, run_project, stress_tester, project)] = project
+        for future in as_completed(futures):
+            record = future.result()
+            writer.write(record)
+            if record["processing_status"] == "completed":
+                summary["completed"] += 1
+            else:
+                summary["failed"] += 1
+            print(f"[{summary['completed'] + summary['failed']}/{len(todo)}] {record['project_name']} "
+                  f"({record['domain']}): {record['processing_status']} in {record['duration_seconds']}s"
+                  + (f" - {record['error']}" if record.get("error") else ""))
+    return summary
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the policy stress test for every project in a manifest.")
+    parser.add_argument("manifest", help="JSONL or CSV file with domain, project_name and documents")
+    parser.add_argument("--output", required=True, help="JSONL file, or directory for --format parquet")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--max-projects", type=int, default=2, help="projects analysed concurrently")
+    parser.add_argument("--stage-concurrency", type=int, default=4, help="stages in flight per project")
+    parser.add_argument("--checkpoint-dir", default=os.getenv("STRESS_TEST_CHECKPOINT_DIR", "checkpoints"))
+    args = parser.parse_args(argv)
+
+    from main import initialize_processor
+    projects = load_manifest(args.manifest)
+    writer = ParquetResultWriter(args.output) if args.format == "parquet" else JsonlResultWriter(args.output)
+    # One processor for every project: the rate-limit scheduler and circuit breaker are shared
+    stress_tester = PolicyStressTestProcessor(
+        initialize_processor(),
+        max_concurrency=args.stage_concurrency,
+        checkpoint_store=CheckpointStore(args.checkpoint_dir)
+    )
+
+    summary = run_batch(stress_tester, projects, writer, max_projects=args.max_projects)
+    print(f"Done: {summary['completed']} completed, {summary['failed']} failed, {summary['skipped']} skipped")
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,398 @@
+"""
+End-to-end benchmark of every Flask route against the local mock LLM server.
+
+    python benchmark_routes.py --clients 1,4,16 --requests 40 --output bench.json
+    python benchmark_routes.py --routes generate-steepv,stress-test --baseline bench.json
+
+The app is served over real HTTP in this process and driven by N concurrent client threads
+with realistic uploads (text, CSV and DOCX). Per route and concurrency level it records
+p50/p95/p99 latency, throughput, bytes sent/received and peak RSS, and writes them as JSON.
+With --baseline, p95 latencies are compared to an earlier run and regressions are listed.
+"""
+
+import argparse
+import io
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional
+
+import requests
+
+from mock_llm_server import start_mock_server
+
+_PARAGRAPH = ("Community sport participation has declined among young people in rural districts, while "
+              "urban facilities are oversubscribed. The national policy proposes shared-use agreements "
+              "with schools, a coaching workforce programme and digital booking for public venues. ")
+
+
+def _docx_bytes(text: str) -> Optional[bytes]:
+    try:
+        from docx import Document
+    except ImportError:
+        return None
+    document = Document()
+    for paragraph in text.split("\n\n"):
+        document.add_paragraph(paragraph)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+class Fixtures:
+    """Upload files plus upstream outputs captured from a priming pass through the pipeline."""
+
+    def __init__(self, unique_payloads: bool = True):
+        self.unique_payloads = unique_payloads
+        policy_text = "\n\n".join(_PARAGRAPH * 4 for _ in range(12))
+        interviews_csv = "respondent,role,answer\n" + "\n".join(
+            f"{i},{'coach' if i % 2 else 'parent'},\"{_PARAGRAPH.strip()}\"" for i in range(60))
+        self.documents = [("documents", ("sport_policy.txt", policy_text.encode("utf-8"), "text/plain"))]
+        docx = _docx_bytes(policy_text)
+        if docx:
+            self.documents.append(("documents", ("sport_strategy.docx", docx,
+                                                 "application/vnd.openxmlformats-officedocument.wordprocessingml.document")))
+        self.interviews = [("interviews", ("interviews.csv", interviews_csv.encode("utf-8"), "text/csv"))]
+        self.policy_files = [("policy_files", ("policy.txt", policy_text.encode("utf-8"), "text/plain"))]
+        self.outputs: Dict[str, Any] = {}
+
+    def domain(self, i: int) -> str:
+        # Distinct domains keep identical concurrent requests from being coalesced into one LLM call
+        return f"Community Sport {i}" if self.unique_payloads else "Community Sport"
+
+    def phase1(self, i: int) -> Dict[str, Any]:
+        return {"project_name": "Sport Futures", "final_domain": self.domain(i)}
+
+    def phase2(self) -> Dict[str, Any]:
+        return {"signals_data": self.outputs.get("signals", {}), "steepv_data": self.outputs.get("steepv", {}),
+                "futures_triangle_data": self.outputs.get("futures_triangle", {})}
+
+    def phase3(self) -> Dict[str, Any]:
+        return {"baseline_scenario": self.outputs.get("baseline", {}),
+                "alternative_scenarios": self.outputs.get("alternatives", {})}
+
+
+class RouteSpec:
+    def __init__(self, name: str, method: str, path: str, build: Callable[[Fixtures, int], Dict[str, Any]],
+                 capture: Callable[[Fixtures, Dict[str, Any]], None] = None, network: bool = False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.build = build
+        self.capture = capture
+        self.network = network
+
+
+def _set(key: str, field: str):
+    def capture(fx: Fixtures, body: Dict[str, Any]):
+        fx.outputs[key] = body.get(field, {})
+    return capture
+
+
+# Listed in pipeline order: the priming pass runs each once and captures outputs for later routes
+ROUTES: List[RouteSpec] = [
+    RouteSpec("index", "GET", "/", lambda fx, i: {}),
+    RouteSpec("health", "GET", "/api/health", lambda fx, i: {}),
+    RouteSpec("metrics", "GET", "/api/metrics", lambda fx, i: {}),
+    RouteSpec("llm-usage", "GET", "/api/llm-usage", lambda fx, i: {}),
+    RouteSpec("generate-domain-map", "POST", "/api/generate-domain-map", lambda fx, i: {
+        "data": {"project_name": "Sport Futures", "final_domain": fx.domain(i)}, "files": fx.documents},
+        capture=_set("domain_map", "domain_map")),
+    RouteSpec("generate-mindmap", "POST", "/api/generate-mindmap", lambda fx, i: {
+        "data": {"domain": fx.domain(i), "domain_map": json.dumps(fx.outputs.get("domain_map", {}))}}),
+    RouteSpec("analyze-interviews", "POST", "/api/analyze-interviews", lambda fx, i: {
+        "data": {"domain": fx.domain(i)}, "files": fx.interviews}),
+    RouteSpec("generate-signals", "POST", "/api/generate-signals", lambda fx, i: {
+        "data": {"domain": fx.domain(i)}, "files": fx.documents + fx.interviews},
+        capture=_set("signals", "signals_data")),
+    RouteSpec("generate-ai-suggestions", "POST", "/api/generate-ai-suggestions", lambda fx, i: {
+        "json": {"domain": fx.domain(i), "signals_data": fx.outputs.get("signals", {})}}),
+    RouteSpec("generate-steepv", "POST", "/api/generate-steepv", lambda fx, i: {
+        "data": {"domain": fx.domain(i), "signals_data": json.dumps(fx.outputs.get("signals", {}))},
+        "files": fx.documents}, capture=_set("steepv", "steepv")),
+    RouteSpec("generate-futures-triangle", "POST", "/api/generate-futures-triangle", lambda fx, i: {
+        "data": {"request_data": json.dumps({"domain": fx.domain(i), "signals_data": fx.outputs.get("signals", {}),
+                                             "steepv_data": fx.outputs.get("steepv", {})})},
+        "files": fx.documents}, capture=_set("futures_triangle", "futures_triangle")),
+    RouteSpec("save-steepv", "POST", "/api/save-steepv", lambda fx, i: {
+        "json": {"domain": fx.domain(i), "steepv_data": fx.outputs.get("steepv", {})}}),
+    RouteSpec("save-futures-triangle", "POST", "/api/save-futures-triangle", lambda fx, i: {
+        "json": {"domain": fx.domain(i), "futures_triangle_data": fx.outputs.get("futures_triangle", {})}}),
+    RouteSpec("save-phase1-progress", "POST", "/api/save-phase1-progress", lambda fx, i: {
+        "json": {"project_name": "Sport Futures", "final_domain": fx.domain(i), "timestamp": time.time(),
+                 "domain_map_generated": True}}),
+    RouteSpec("generate-futures-triangle-2-0", "POST", "/api/generate-futures-triangle-2-0", lambda fx, i: {
+        "data": {"domain": fx.domain(i), "phase1_data": json.dumps(fx.phase1(i)), "phase2_data": json.dumps(fx.phase2())},
+        "files": fx.documents}, capture=_set("triangle_2_0", "futures_triangle_2_0")),
+    RouteSpec("generate-baseline-scenario", "POST", "/api/generate-baseline-scenario", lambda fx, i: {
+        "json": {"domain": fx.domain(i), "triangle_2_0_data": fx.outputs.get("triangle_2_0", {}),
+                 "phase1_data": fx.phase1(i)}}, capture=_set("baseline", "baseline_scenario")),
+    RouteSpec("generate-driver-outcomes", "POST", "/api/generate-driver-outcomes", lambda fx, i: {
+        "json": {"domain": fx.domain(i), "triangle_2_0_data": fx.outputs.get("triangle_2_0", {}),
+                 "baseline_data": fx.outputs.get("baseline", {}), "phase1_data": fx.phase1(i)}},
+        capture=_set("driver_outcomes", "driver_outcomes")),
+    RouteSpec("generate-alternative-scenarios", "POST", "/api/generate-alternative-scenarios", lambda fx, i: {
+        "json": {"domain": fx.domain(i), "collapse_count": 1, "new_equilibrium_count": 1, "transformation_count": 1,
+                 "baseline_data": fx.outputs.get("baseline", {}), "driver_outcomes": fx.outputs.get("driver_outcomes", {}),
+                 "triangle_2_0_data": fx.outputs.get("triangle_2_0", {})}},
+        capture=_set("alternatives", "alternative_scenarios")),
+    RouteSpec("wind-tunnel-analysis", "POST", "/api/wind-tunnel-analysis", lambda fx, i: {
+        "data": {"domain": fx.domain(i), "project_name": "Sport Futures", "phase3_scenarios": json.dumps(fx.phase3())},
+        "files": fx.policy_files}),
+    RouteSpec("stress-test", "POST", "/api/stress-test", lambda fx, i: {
+        "data": {"domain": fx.domain(i), "project_name": "Sport Futures"}, "files": fx.documents},
+        capture=_set("run_id", "run_id")),
+    RouteSpec("stress-test-stale-stages", "POST", "/api/stress-test/stale-stages", lambda fx, i: {
+        "json": {"run_id": fx.outputs.get("run_id", "")}}),
+    RouteSpec("recompute-stale", "POST", "/api/recompute-stale", lambda fx, i: {
+        "json": {"run_id": fx.outputs.get("run_id", "")}}),
+    # Served by the offline translation provider unless --include-network selects the real one
+    RouteSpec("translate", "POST", "/api/translate", lambda fx, i: {
+        "json": {"text": _PARAGRAPH, "source_language": "en", "target_language": "lo"}}),
+    RouteSpec("translate-batch", "POST", "/api/translate/batch", lambda fx, i: {
+        "json": {"document": fx.outputs.get("baseline", {}), "source_language": "en",
+                 "target_language": "lo"}}),
+]
+
+
+class RssSampler:
+    """Track peak resident set size of this process (server and clients share it) while running."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current_bytes() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            # No procfs: fall back to the lifetime peak (KiB on Linux, bytes on macOS)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self.current_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_bytes = self.current_bytes()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.current_bytes())
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _send(session: requests.Session, base_url: str, spec: RouteSpec, kwargs: Dict[str, Any], timeout: float):
+    prepared = session.prepare_request(requests.Request(spec.method, base_url + spec.path, **kwargs))
+    started = time.perf_counter()
+    response = session.send(prepared, timeout=timeout)
+    elapsed = time.perf_counter() - started
+    body = prepared.body or b""
+    sent = len(body.encode("utf-8") if isinstance(body, str) else body)
+    return response, elapsed, sent
+
+
+def benchmark_route(base_url: str, spec: RouteSpec, fixtures: Fixtures, clients: int, total_requests: int,
+                    timeout: float) -> Dict[str, Any]:
+    """Fire total_requests at one route from `clients` concurrent sessions."""
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    totals = {"bytes_sent": 0, "bytes_received": 0, "errors": 0}
+    lock = threading.Lock()
+    counter = iter(range(total_requests))
+
+    def client_loop():
+        session = requests.Session()
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            try:
+                response, elapsed, sent = _send(session, base_url, spec, spec.build(fixtures, i), timeout)
+                status, received = str(response.status_code), len(response.content)
+            except requests.RequestException as e:
+                elapsed, sent, received, status = 0.0, 0, 0, type(e).__name__
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status.startswith("2"):
+                    latencies.append(elapsed)
+                else:
+                    totals["errors"] += 1
+                totals["bytes_sent"] += sent
+                totals["bytes_received"] += received
+
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            for _ in range(clients):
+                pool.submit(client_loop)
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        "clients": clients,
+        "requests": total_requests,
+        "errors": totals["errors"],
+        "status_codes": statuses,
+        "latency_ms": {
+            "p50": to_ms(percentile(latencies, 50)),
+            "p95": to_ms(percentile(latencies, 95)),
+            "p99": to_ms(percentile(latencies, 99)),
+            "mean": to_ms(sum(latencies) / len(latencies)) if latencies else None,
+            "max": to_ms(latencies[-1] if latencies else None)
+        },
+        "throughput_rps": round(len(latencies) / wall, 2) if wall > 0 else None,
+        "wall_seconds": round(wall, 3),
+        "bytes_sent": totals["bytes_sent"],
+        "bytes_received": totals["bytes_received"],
+        "peak_rss_mb": round(rss.peak_bytes / (1024 * 1024), 1)
+    }
+
+
+def prime(base_url: str, routes: List[RouteSpec], fixtures: Fixtures, timeout: float):
+    """Call every route once in pipeline order so downstream routes get realistic inputs."""
+    session = requests.Session()
+    for spec in routes:
+        if spec.capture is None:
+            continue
+        response, _, _ = _send(session, base_url, spec, spec.build(fixtures, 0), timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"Priming {spec.name} failed with {response.status_code}: {response.text[:200]}")
+        spec.capture(fixtures, response.json())
+
+
+def find_regressions(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                     min_delta_ms: float = 10.0) -> List[Dict[str, Any]]:
+    """Routes whose p95 latency grew by more than `threshold` (fractional) and min_delta_ms at the same concurrency."""
+    regressions = []
+    for route, levels in results["routes"].items():
+        previous_levels = {level["clients"]: level for level in baseline.get("routes", {}).get(route, [])}
+        for level in levels:
+            previous = previous_levels.get(level["clients"])
+            current_p95 = level["latency_ms"]["p95"]
+            previous_p95 = previous and previous["latency_ms"]["p95"]
+            if (current_p95 and previous_p95 and current_p95 > previous_p95 * (1 + threshold)
+                    and current_p95 - previous_p95 >= min_delta_ms):
+                regressions.append({"route": route, "clients": level["clients"], "p95_ms": current_p95,
+                                    "baseline_p95_ms": previous_p95,
+                                    "change": f"+{(current_p95 / previous_p95 - 1) * 100:.0f}%"})
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every API route against the mock LLM server.")
+    parser.add_argument("--clients", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="requests per route and concurrency level")
+    parser.add_argument("--routes", default="", help="comma-separated route names (default: all)")
+    parser.add_argument("--include-network", action="store_true",
+                        help="use the real translation provider instead of the offline stand-in")
+    parser.add_argument("--repeat-payloads", action="store_true", help="send identical payloads (exercises coalescing)")
+    parser.add_argument("--mock-latency", type=float, default=0.3)
+    parser.add_argument("--mock-jitter", type=float, default=0.15)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    parser.add_argument("--mock-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default="", help="earlier results file to compare p95 latencies against")
+    parser.add_argument("--regression-threshold", type=float, default=0.2, help="fractional p95 increase to flag")
+    parser.add_argument("--regression-min-ms", type=float, default=10.0, help="ignore smaller absolute p95 increases")
+    args = parser.parse_args(argv)
+
+    mock_server, mock_url = start_mock_server(
+        latency=args.mock_latency, jitter=args.mock_jitter, distribution="lognormal", seed=42,
+        error_rate=args.mock_error_rate, rate_limit_rate=args.mock_rate_limit_rate
+    )
+    os.environ["GROQ_BASE_URL"] = mock_url
+    os.environ.setdefault("GROQ_API_KEY", "mock")
+    # The mock has no quota of its own unless asked; don't let the client-side limiter dominate
+    os.environ.setdefault("GROQ_RPM_LIMIT", "100000")
+    os.environ.setdefault("GROQ_TPM_LIMIT", "1000000000")
+    os.environ.setdefault("STRESS_TEST_CHECKPOINT_DIR", tempfile.mkdtemp(prefix="bench-checkpoints-"))
+    # A fresh translation memory per run, so cache hits only come from this run's own traffic
+    os.environ.setdefault("TRANSLATION_CACHE_DB", os.path.join(tempfile.mkdtemp(prefix="bench-translations-"),
+                                                               "translation_cache.db"))
+    if not args.include_network:
+        os.environ.setdefault("TRANSLATION_SERVICE", "offline")
+
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    from app import create_app
+    app_server = make_server("127.0.0.1", 0, create_app(), threaded=True)
+    threading.Thread(target=app_server.serve_forever, name="app-server", daemon=True).start()
+    base_url = f"http://127.0.0.1:{app_server.server_port}"
+
+    selected = set(filter(None, args.routes.split(",")))
+    routes = [spec for spec in ROUTES
+              if (not selected or spec.name in selected) and (args.include_network or not spec.network)]
+    levels = [int(level) for level in args.clients.split(",") if level.strip()]
+
+    fixtures = Fixtures(unique_payloads=not args.repeat_payloads)
+    print(f"Priming fixtures against {base_url} (mock LLM at {mock_url})")
+    prime(base_url, [spec for spec in ROUTES if args.include_network or not spec.network], fixtures, args.timeout)
+
+    results = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpu_count": os.cpu_count()},
+        "routes": {}
+    }
+    for spec in routes:
+        results["routes"][spec.name] = []
+        for clients in levels:
+            stats = benchmark_route(base_url, spec, fixtures, clients, args.requests, args.timeout)
+            results["routes"][spec.name].append(stats)
+            latency = stats["latency_ms"]
+            print(f"{spec.name:32} c={clients:<3} p50={latency['p50']}ms p95={latency['p95']}ms "
+                  f"p99={latency['p99']}ms {stats['throughput_rps']} req/s errors={stats['errors']} "
+                  f"rss={stats['peak_rss_mb']}MB")
+    results["mock_llm"] = mock_server.RequestHandlerClass.behaviour.stats()
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["regressions"] = find_regressions(results, json.load(f), args.regression_threshold,
+                                                      args.regression_min_ms)
+        for regression in results["regressions"]:
+            print(f"REGRESSION {regression['route']} c={regression['clients']}: p95 {regression['baseline_p95_ms']}ms"
+                  f" -> {regression['p95_ms']}ms ({regression['change']})")
+        exit_code = 1 if results["regressions"] else 0
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    app_server.shutdown()
+    mock_server.shutdown()
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
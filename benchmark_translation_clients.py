@@ -0,0 +1,151 @@
+"""
+Micro-benchmark of per-call translation client overhead against a local translate endpoint.
+
+    python benchmark_translation_clients.py --calls 500 --threads 1,8
+    python benchmark_translation_clients.py --latency 0.02 --output translation_clients.json
+
+"per_call_client" is the old FreeGoogleTranslator path: a new deep-translator GoogleTranslator
+and a new HTTP connection for every string. "shared_client" is GoogleWebTranslateClient, built
+once per process with a pooled keep-alive session. Both hit the same local server, so the
+difference is client construction plus TCP connection setup; over TLS to Google the saved
+handshake is larger still.
+"""
+
+import argparse
+import json
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, List, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from translation_service import GoogleWebTranslateClient
+
+
+class FakeTranslateHandler(BaseHTTPRequestHandler):
+    """Answers like translate.google.com/m: the translation sits in <div class="result-container">."""
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; without this, keep-alive clients hit delayed-ACK stalls
+    disable_nagle_algorithm = True
+    latency = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        text = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        if self.latency:
+            time.sleep(self.latency)
+        body = f'<html><body><div class="result-container">[{text}]</div></body></html>'.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _serve(latency: float, ports: "multiprocessing.Queue"):
+    handler = type("Handler", (FakeTranslateHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def start_translate_server(latency: float = 0.0) -> Tuple[multiprocessing.Process, str]:
+    """Serve from a separate process so the server does not compete with the clients for the GIL."""
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(latency, ports), daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{ports.get(timeout=10)}/m"
+
+
+def per_call_client(base_url: str) -> Callable[[str], str]:
+    """The old path: a fresh translator object and connection for every string."""
+    try:
+        from deep_translator import GoogleTranslator
+    except ImportError:
+        GoogleTranslator = None
+
+    def translate(text: str) -> str:
+        if GoogleTranslator is None:
+            return requests.get(base_url, params={"sl": "en", "tl": "lo", "q": text}, timeout=30).text
+        translator = GoogleTranslator(source="en", target="lo")
+        # deep-translator hardcodes translate.google.com; point this instance at the local server
+        translator._base_url = base_url
+        return translator.translate(text)
+
+    return translate
+
+
+def shared_client(base_url: str, pool_size: int) -> Callable[[str], str]:
+    client = GoogleWebTranslateClient(base_url=base_url, pool_size=pool_size)
+    return lambda text: client.translate(text, "en", "lo")
+
+
+def measure(translate: Callable[[str], str], calls: int, threads: int) -> Dict[str, Any]:
+    durations: List[float] = []
+    lock = threading.Lock()
+
+    def one(i: int):
+        started = time.perf_counter()
+        translate(f"Community sport participation sentence {i}.")
+        elapsed = time.perf_counter() - started
+        with lock:
+            durations.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(calls)))
+    wall = time.perf_counter() - started
+    durations.sort()
+    return {
+        "threads": threads,
+        "calls": calls,
+        "mean_us": round(sum(durations) / len(durations) * 1e6, 1),
+        "p50_us": round(durations[len(durations) // 2] * 1e6, 1),
+        "p95_us": round(durations[min(len(durations) - 1, int(0.95 * len(durations)))] * 1e6, 1),
+        "calls_per_second": round(calls / wall, 1)
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare per-call and shared translation clients.")
+    parser.add_argument("--calls", type=int, default=300, help="translations per client and thread count")
+    parser.add_argument("--threads", default="1,8", help="comma-separated concurrency levels")
+    parser.add_argument("--latency", type=float, default=0.0, help="server-side seconds per request")
+    parser.add_argument("--output", default="", help="optional JSON results file")
+    args = parser.parse_args(argv)
+
+    server, base_url = start_translate_server(args.latency)
+    levels = [int(level) for level in args.threads.split(",") if level.strip()]
+    results = {"config": vars(args), "clients": {}}
+    for name, build in (("per_call_client", lambda threads: per_call_client(base_url)),
+                        ("shared_client", lambda threads: shared_client(base_url, threads))):
+        results["clients"][name] = []
+        for threads in levels:
+            translate = build(threads)
+            translate("warm-up")
+            stats = measure(translate, args.calls, threads)
+            results["clients"][name].append(stats)
+            print(f"{name:16} threads={threads:<3} mean={stats['mean_us']}us p50={stats['p50_us']}us "
+                  f"p95={stats['p95_us']}us {stats['calls_per_second']} calls/s")
+
+    for before, after in zip(results["clients"]["per_call_client"], results["clients"]["shared_client"]):
+        print(f"threads={before['threads']:<3} per-call overhead saved: "
+              f"{round(before['mean_us'] - after['mean_us'], 1)}us ({round(before['mean_us'] / after['mean_us'], 2)}x)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    server.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
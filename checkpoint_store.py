@@ -0,0 +1,77 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class CheckpointStore:
+    """File-backed store for pipeline stage outputs.
+
+    Layout: <directory>/<run_id>/manifest.json holds the run inputs and
+    <directory>/<run_id>/<stage>.json holds one completed stage output together with the hash
+    of the inputs it was computed from. A checkpoint is only reused when that hash matches.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _check_name(name: str) -> str:
+        if not re.fullmatch(r'[\w.-]+', name or ""):
+            raise ValueError(f"Invalid checkpoint name: {name!r}")
+        return name
+
+    def _run_dir(self, run_id: str) -> str:
+        return os.path.join(self.directory, self._check_name(run_id))
+
+    def _write_json(self, path: str, data: Dict[str, Any]):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique per writer: threads of one process may save the same checkpoint concurrently
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        # Atomic rename so a crash never leaves a half-written checkpoint behind
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_manifest(self, run_id: str, manifest: Dict[str, Any]):
+        self._write_json(os.path.join(self._run_dir(run_id), "manifest.json"), manifest)
+
+    def load_manifest(self, run_id: str) -> Optional[Dict[str, Any]]:
+        return self._read_json(os.path.join(self._run_dir(run_id), "manifest.json"))
+
+    def save(self, run_id: str, stage: str, input_hash: str, output: Any):
+        path = os.path.join(self._run_dir(run_id), f"{self._check_name(stage)}.json")
+        self._write_json(path, {"input_hash": input_hash, "completed_at": time.time(), "output": output})
+
+    def load(self, run_id: str, stage: str, input_hash: str) -> Tuple[bool, Any]:
+        """Return (True, output) when a checkpoint exists for exactly these inputs."""
+        path = os.path.join(self._run_dir(run_id), f"{self._check_name(stage)}.json")
+        checkpoint = self._read_json(path)
+        if checkpoint is None or checkpoint.get("input_hash") != input_hash:
+            return False, None
+        return True, checkpoint.get("output")
+
+    def completed_stages(self, run_id: str) -> List[str]:
+        run_dir = self._run_dir(run_id)
+        if not os.path.isdir(run_dir):
+            return []
+        return sorted(
+            name[:-len(".json")] for name in os.listdir(run_dir)
+            if name.endswith(".json") and name != "manifest.json"
+        )
+
+    def list_runs(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.isfile(os.path.join(self.directory, name, "manifest.json"))
+        )
@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from llm_coalescing import request_key
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+class _Namespace:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class _ReplayedResponse:
+    """Stands in for the SDK's raw response: .headers plus .parse() -> chat completion."""
+
+    def __init__(self, content: str, usage: Dict[str, int]):
+        self.headers = {}
+        self._completion = _Namespace(
+            choices=[_Namespace(message=_Namespace(role="assistant", content=content), finish_reason="stop", index=0)],
+            usage=_Namespace(**usage)
+        )
+
+    def parse(self):
+        return self._completion
+
+
+def _usage_dict(usage: Any) -> Dict[str, int]:
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+        "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+        "total_tokens": getattr(usage, "total_tokens", 0) or 0
+    }
+
+
+class _Completions:
+    def __init__(self, create):
+        self.create = create
+        self.with_raw_response = _Namespace(create=create)
+
+
+_cassette_locks: Dict[str, threading.Lock] = {}
+_cassette_locks_lock = threading.Lock()
+
+
+def _cassette_lock(path: str) -> threading.Lock:
+    """One lock per cassette file, shared by every RecordingClient appending to it."""
+    key = os.path.abspath(path)
+    with _cassette_locks_lock:
+        return _cassette_locks.setdefault(key, threading.Lock())
+
+
+class RecordingClient:
+    """Wraps a Groq client and appends every successful chat completion to a JSONL cassette.
+
+    Each line holds the request key, the request itself, the response content and usage, and
+    the observed latency, so a replay can reproduce both the answers and their timing. Routes
+    build a client per request, so appends are serialised by a lock shared per cassette path.
+    """
+
+    def __init__(self, client, path: str):
+        self._client = client
+        self.path = path
+        self._lock = _cassette_lock(path)
+        self._recorded = 0
+        self.chat = _Namespace(completions=_Completions(self._create))
+
+    def _create(self, **request_kwargs):
+        started = time.monotonic()
+        raw_response = self._client.chat.completions.with_raw_response.create(**request_kwargs)
+        latency = time.monotonic() - started
+        completion = raw_response.parse()
+        entry = {
+            "key": request_key(request_kwargs),
+            "request": request_kwargs,
+            "response": {
+                "content": completion.choices[0].message.content,
+                "usage": _usage_dict(getattr(completion, "usage", None))
+            },
+            "latency": round(latency, 4),
+            "recorded_at": time.time()
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._recorded += 1
+        return raw_response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"recorded": self._recorded}
+
+
+class ReplayClient:
+    """Serves chat completions from a cassette without touching the network.
+
+    latency: None replays each entry's recorded latency, a number uses that fixed delay instead.
+    tokens_per_second: when set, adds completion_tokens / tokens_per_second to simulate output
+    throughput. Identical requests recorded several times are replayed in recording order,
+    cycling once exhausted. Unknown requests raise CassetteMiss.
+    """
+
+    def __init__(self, path: str, latency: Optional[float] = None, tokens_per_second: Optional[float] = None):
+        self.path = path
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "simulated_seconds": 0.0}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+        self.chat = _Namespace(completions=_Completions(self._create))
+
+    def _create(self, **request_kwargs):
+        key = request_key(request_kwargs)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self._stats["misses"] += 1
+                raise CassetteMiss(f"No recorded response for request {key[:12]} in {self.path}")
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            entry = entries[position % len(entries)]
+
+        response = entry["response"]
+        delay = entry.get("latency", 0.0) if self.latency is None else self.latency
+        if self.tokens_per_second:
+            delay += response["usage"].get("completion_tokens", 0) / self.tokens_per_second
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["simulated_seconds"] += delay
+        if delay > 0:
+            time.sleep(delay)
+        return _ReplayedResponse(response["content"], response["usage"])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["simulated_seconds"] = round(stats["simulated_seconds"], 3)
+        stats["recorded_requests"] = sum(len(entries) for entries in self._entries.values())
+        return stats
+
+
+_replay_clients: Dict[tuple, ReplayClient] = {}
+_replay_clients_lock = threading.Lock()
+
+
+def cassette_mode() -> str:
+    """'record', 'replay' or '' from LLM_CASSETTE_MODE."""
+    return os.getenv("LLM_CASSETTE_MODE", "").strip().lower()
+
+
+def wrap_client_from_env(client):
+    """Apply LLM_CASSETTE_MODE / LLM_CASSETTE_PATH to a Groq client.
+
+    Replay timing is tuned with LLM_REPLAY_LATENCY (seconds per call, default: as recorded)
+    and LLM_REPLAY_TOKENS_PER_SECOND.
+    """
+    mode = cassette_mode()
+    if not mode:
+        return client
+    path = os.getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl")
+    if mode == "record":
+        return RecordingClient(client, path)
+    if mode == "replay":
+        latency = os.getenv("LLM_REPLAY_LATENCY", "")
+        tokens_per_second = os.getenv("LLM_REPLAY_TOKENS_PER_SECOND", "")
+        settings = (path, float(latency) if latency else None, float(tokens_per_second) if tokens_per_second else None)
+        # Routes that build a processor per request share one loaded cassette (and its stats)
+        with _replay_clients_lock:
+            if settings not in _replay_clients:
+                _replay_clients[settings] = ReplayClient(*settings)
+            return _replay_clients[settings]
+    raise ValueError(f"Unknown LLM_CASSETTE_MODE: {mode!r} (expected 'record' or 'replay')")
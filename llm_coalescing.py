@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from contextlib import closing
+from typing import Dict, Any, Callable, Optional
+
+from metrics import record_cache_lookup
+
+
+def request_key(request_kwargs: Dict[str, Any]) -> str:
+    """Stable hash of a chat completion request (model, messages and sampling parameters)."""
+    canonical = json.dumps(request_kwargs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesce identical concurrent requests so only one of them reaches the provider.
+
+    Within a process, callers with the same key share one in-flight Future. When sqlite_path
+    is given, workers additionally elect a leader through a lease row in a shared SQLite file;
+    the other workers poll that row and reuse the leader's result.
+    """
+
+    def __init__(self, sqlite_path: str = None, lease_seconds: float = 300.0, result_ttl: float = 30.0,
+                 poll_interval: float = 0.25):
+        self.sqlite_path = sqlite_path
+        self.lease_seconds = lease_seconds
+        self.result_ttl = result_ttl
+        self.poll_interval = poll_interval
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"leaders": 0, "coalesced": 0, "cross_worker_coalesced": 0}
+        if sqlite_path:
+            with closing(self._connect()) as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_inflight ("
+                    "key TEXT PRIMARY KEY, owner TEXT, started REAL, finished REAL, result TEXT, error TEXT)"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.sqlite_path, timeout=30, isolation_level=None)
+
+    def do(self, key: str, fn: Callable[[], str]) -> str:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self._stats["leaders"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            record_cache_lookup("llm_response", hit=True)
+            return future.result()
+
+        try:
+            result = self._run_across_workers(key, fn)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _run_across_workers(self, key: str, fn: Callable[[], str]) -> str:
+        if not self.sqlite_path:
+            record_cache_lookup("llm_response", hit=False)
+            return fn()
+
+        while not self._claim(key):
+            outcome = self._wait_for_leader(key)
+            if outcome is None:
+                # Leader's lease expired or its row vanished: try to take over
+                continue
+            result, error = outcome
+            with self._lock:
+                self._stats["cross_worker_coalesced"] += 1
+            record_cache_lookup("llm_response", hit=True)
+            if error is not None:
+                raise RuntimeError(f"Coalesced LLM request failed in another worker: {error}")
+            return result
+
+        record_cache_lookup("llm_response", hit=False)
+        try:
+            result = fn()
+        except Exception as e:
+            self._finish(key, None, str(e))
+            raise
+        self._finish(key, result, None)
+        return result
+
+    def _claim(self, key: str) -> bool:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT started, finished, error FROM llm_inflight WHERE key = ?", (key,)).fetchone()
+            claimable = (
+                row is None
+                or (row[1] is None and now - row[0] > self.lease_seconds)
+                or (row[1] is not None and now - row[1] > self.result_ttl)
+                # A failure is only shared with the callers that were waiting for it, never reused
+                or (row[1] is not None and row[2] is not None)
+            )
+            if claimable:
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_inflight (key, owner, started, finished, result, error) "
+                    "VALUES (?, ?, ?, NULL, NULL, NULL)",
+                    (key, self._owner, now)
+                )
+                conn.execute("DELETE FROM llm_inflight WHERE finished IS NOT NULL AND finished < ?", (now - self.result_ttl,))
+            conn.execute("COMMIT")
+            return claimable
+
+    def _wait_for_leader(self, key: str) -> Optional[tuple]:
+        while True:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT started, finished, result, error FROM llm_inflight WHERE key = ?", (key,)
+                ).fetchone()
+            now = time.time()
+            if row is None:
+                return None
+            started, finished, result, error = row
+            if finished is not None:
+                return None if now - finished > self.result_ttl else (result, error)
+            if now - started > self.lease_seconds:
+                return None
+            time.sleep(self.poll_interval)
+
+    def _finish(self, key: str, result: Optional[str], error: Optional[str]):
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE llm_inflight SET finished = ?, result = ?, error = ? WHERE key = ? AND owner = ?",
+                (time.time(), result, error, key, self._owner)
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["in_flight"] = len(self._inflight)
+        return stats
+
+
+_default_single_flight: Optional[SingleFlight] = None
+_default_single_flight_lock = threading.Lock()
+
+
+def get_default_single_flight() -> SingleFlight:
+    """Process-wide coalescer; set LLM_SINGLE_FLIGHT_DB to also coalesce across workers."""
+    global _default_single_flight
+    with _default_single_flight_lock:
+        if _default_single_flight is None:
+            _default_single_flight = SingleFlight(sqlite_path=os.getenv("LLM_SINGLE_FLIGHT_DB") or None)
+        return _default_single_flight
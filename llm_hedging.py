@@ -0,0 +1,133 @@
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, Optional
+
+
+class HedgeCancelled(Exception):
+    """Raised inside a hedged attempt that lost the race before it was sent."""
+
+
+class LatencyTracker:
+    """Rolling window of observed call latencies per operation."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(operation, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, operation: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(operation, ()))
+        if len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+class HedgingPolicy:
+    """Fire a duplicate request when the first one outlives the operation's latency percentile.
+
+    The attempt function receives a threading.Event; the losing attempt's event is set so it can
+    abandon the call if it has not been sent yet (e.g. while still queued in the rate-limit
+    scheduler). A request already on the wire cannot be aborted with the sync client, so its
+    result is simply discarded.
+    """
+
+    def __init__(self, percentile: float = 95.0, min_samples: int = 20, default_deadline: float = None,
+                 max_workers: int = 16):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_deadline = default_deadline
+        self.latencies = LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._stats = {"calls": 0, "hedges_fired": 0, "hedge_wins": 0}
+        self._lock = threading.Lock()
+
+    def deadline(self, operation: str) -> Optional[float]:
+        deadline = self.latencies.percentile(operation, self.percentile, self.min_samples)
+        return deadline if deadline is not None else self.default_deadline
+
+    def _submit(self, fn: Callable, *args):
+        # Copy the caller's context so the scheduler priority follows the request into the pool
+        context = contextvars.copy_context()
+        return self._executor.submit(context.run, fn, *args)
+
+    def call(self, operation: str, fn: Callable[[threading.Event], Any]) -> Any:
+        with self._lock:
+            self._stats["calls"] += 1
+
+        deadline = self.deadline(operation)
+        started = time.monotonic()
+
+        if deadline is None:
+            result = fn(threading.Event())
+            self.latencies.record(operation, time.monotonic() - started)
+            return result
+
+        primary_cancel = threading.Event()
+        primary = self._submit(fn, primary_cancel)
+
+        def record_primary(future):
+            if not future.cancelled() and future.exception() is None:
+                self.latencies.record(operation, time.monotonic() - started)
+        primary.add_done_callback(record_primary)
+
+        done, _ = wait([primary], timeout=deadline)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self._stats["hedges_fired"] += 1
+        hedge_cancel = threading.Event()
+        hedge = self._submit(fn, hedge_cancel)
+        cancels = {primary: primary_cancel, hedge: hedge_cancel}
+
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        cancels[loser].set()
+                        loser.cancel()
+                    if future is hedge:
+                        with self._lock:
+                            self._stats["hedge_wins"] += 1
+                    return future.result()
+                if first_error is None or future is primary:
+                    first_error = future.exception()
+        raise first_error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hedge_win_rate"] = round(stats["hedge_wins"] / stats["hedges_fired"], 3) if stats["hedges_fired"] else 0.0
+        return stats
+
+
+_default_policy: Optional[HedgingPolicy] = None
+_default_policy_lock = threading.Lock()
+
+
+def get_default_hedging_policy() -> Optional[HedgingPolicy]:
+    """Process-wide hedging policy, enabled by setting LLM_HEDGE_PERCENTILE (e.g. 95); None otherwise.
+
+    Shared so every processor feeds one latency history per operation.
+    """
+    global _default_policy
+    percentile = os.getenv("LLM_HEDGE_PERCENTILE", "")
+    if not percentile:
+        return None
+    with _default_policy_lock:
+        if _default_policy is None:
+            _default_policy = HedgingPolicy(percentile=float(percentile))
+        return _default_policy
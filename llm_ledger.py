@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Any, List, Optional
+
+from metrics import observe_llm_call
+from structured_logging import get_logger
+
+log = get_logger("llm_ledger")
+
+_call_tags: ContextVar = ContextVar("llm_call_tags", default={})
+
+
+@contextmanager
+def llm_call_tags(**tags):
+    """Tag the enclosed LLM calls (e.g. route="/api/generate-steepv", project="Sport") in the ledger."""
+    token = set_call_tags(**tags)
+    try:
+        yield
+    finally:
+        reset_call_tags(token)
+
+
+def set_call_tags(**tags) -> Token:
+    """Non-context-manager form of llm_call_tags for request hooks; undo with reset_call_tags(token)."""
+    return _call_tags.set(dict(_call_tags.get(), **{k: v for k, v in tags.items() if v}))
+
+
+def reset_call_tags(token: Token):
+    _call_tags.reset(token)
+
+
+def current_call_tags() -> Dict[str, str]:
+    return _call_tags.get()
+
+
+class LLMCallMetrics:
+    """Measurements for one logical LLM call, accumulated across its retry and hedge attempts."""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.tags = dict(current_call_tags())
+        self.started = time.monotonic()
+        self.attempts = 0
+        self.queue_wait = 0.0
+        self.network = 0.0
+        self.parse = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def add_attempt(self, queue_wait: float, network: float, usage: Any = None):
+        with self._lock:
+            self.attempts += 1
+            self.queue_wait += queue_wait
+            self.network += network
+            if usage is not None:
+                self.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+                self.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def to_record(self, model: str, status: str, error: str = None) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "timestamp": time.time(),
+                "operation": self.operation,
+                "route": self.tags.get("route"),
+                "project": self.tags.get("project"),
+                "model": model,
+                "status": status,
+                "error": error,
+                # A call served by another in-flight identical request makes no attempts of its own
+                "coalesced": self.attempts == 0 and error is None,
+                "attempts": self.attempts,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens,
+                "queue_wait_seconds": round(self.queue_wait, 4),
+                "network_seconds": round(self.network, 4),
+                "parse_seconds": round(self.parse, 4),
+                "total_seconds": round(time.monotonic() - self.started, 4)
+            }
+
+
+class LLMLedger:
+    """Per-call usage and latency records, kept in memory and optionally appended to a JSONL file.
+
+    Cost estimates use prompt/completion prices per million tokens when they are configured.
+    """
+
+    def __init__(self, path: str = None, max_records: int = 10000, prompt_price_per_m: float = 0.0,
+                 completion_price_per_m: float = 0.0):
+        self.path = path
+        self.prompt_price_per_m = prompt_price_per_m
+        self.completion_price_per_m = completion_price_per_m
+        self._records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+
+    def cost(self, record: Dict[str, Any]) -> float:
+        return (record["prompt_tokens"] * self.prompt_price_per_m
+                + record["completion_tokens"] * self.completion_price_per_m) / 1_000_000
+
+    def record(self, record: Dict[str, Any]):
+        record["estimated_cost"] = round(self.cost(record), 6)
+        observe_llm_call(record)
+        with self._lock:
+            self._records.append(record)
+            if self.path:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                except OSError as e:
+                    # Losing a ledger line must never fail the generation call itself
+                    log.error("LLM ledger write failed", extra={"path": self.path, "error": str(e),
+                                                                "sample_key": "ledger_write_failed"})
+
+    def records(self, limit: int = None, **filters) -> List[Dict[str, Any]]:
+        """Most recent records first, optionally filtered by field values (e.g. route=..., project=...)."""
+        with self._lock:
+            records = list(self._records)
+        records = [r for r in reversed(records) if all(r.get(k) == v for k, v in filters.items())]
+        return records[:limit] if limit else records
+
+    def summary(self, group_by: str = "operation") -> Dict[str, Dict[str, Any]]:
+        """Totals and latency percentiles per operation, route, project or model."""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for record in self.records():
+            groups.setdefault(str(record.get(group_by)), []).append(record)
+
+        summary = {}
+        for key, records in groups.items():
+            totals = sorted(r["total_seconds"] for r in records)
+            summary[key] = {
+                "calls": len(records),
+                "errors": sum(1 for r in records if r["status"] == "error"),
+                "parse_failures": sum(1 for r in records if r["status"] == "parse_failure"),
+                "coalesced": sum(1 for r in records if r["coalesced"]),
+                "attempts": sum(r["attempts"] for r in records),
+                "prompt_tokens": sum(r["prompt_tokens"] for r in records),
+                "completion_tokens": sum(r["completion_tokens"] for r in records),
+                "estimated_cost": round(sum(r["estimated_cost"] for r in records), 6),
+                "queue_wait_seconds": round(sum(r["queue_wait_seconds"] for r in records), 3),
+                "network_seconds": round(sum(r["network_seconds"] for r in records), 3),
+                "parse_seconds": round(sum(r["parse_seconds"] for r in records), 3),
+                "p50_seconds": totals[len(totals) // 2],
+                "p95_seconds": totals[min(len(totals) - 1, int(0.95 * len(totals)))]
+            }
+        return summary
+
+    @staticmethod
+    def load(path: str) -> List[Dict[str, Any]]:
+        """Read a persisted ledger file back for offline analysis."""
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+_default_ledger: Optional[LLMLedger] = None
+_default_ledger_lock = threading.Lock()
+
+
+def get_default_ledger() -> LLMLedger:
+    """Process-wide ledger; LLM_LEDGER_PATH persists it, LLM_PRICE_PROMPT_PER_M / LLM_PRICE_COMPLETION_PER_M price it."""
+    global _default_ledger
+    with _default_ledger_lock:
+        if _default_ledger is None:
+            _default_ledger = LLMLedger(
+                path=os.getenv("LLM_LEDGER_PATH") or None,
+                prompt_price_per_m=float(os.getenv("LLM_PRICE_PROMPT_PER_M", "0") or 0),
+                completion_price_per_m=float(os.getenv("LLM_PRICE_COMPLETION_PER_M", "0") or 0)
+            )
+        return _default_ledger
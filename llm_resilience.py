@@ -0,0 +1,189 @@
+import threading
+import time
+from typing import Dict, Any, Callable, Optional
+
+from groq import APIConnectionError, APIStatusError
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from tenacity.wait import wait_base
+
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the provider while the circuit breaker is open."""
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Transient provider failures: 429s, 5xx responses, timeouts and connection errors."""
+    if isinstance(exc, APIConnectionError):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read the Retry-After header from a provider error, if it carries one."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def failed_generation(exc: BaseException) -> Optional[str]:
+    """The rejected model output of a 400 json_validate_failed error (JSON mode), else None."""
+    if not isinstance(exc, APIStatusError) or exc.status_code != 400:
+        return None
+    body = exc.body if isinstance(exc.body, dict) else {}
+    error = body.get("error", body)
+    if not isinstance(error, dict) or error.get("code") != "json_validate_failed":
+        return None
+    generation = error.get("failed_generation")
+    return generation if isinstance(generation, str) else None
+
+
+class wait_retry_after(wait_base):
+    """Honour Retry-After when the provider sends it, otherwise defer to the fallback strategy."""
+
+    def __init__(self, fallback: wait_base, max_wait: float):
+        self.fallback = fallback
+        self.max_wait = max_wait
+
+    def __call__(self, retry_state) -> float:
+        retry_after = retry_after_seconds(retry_state.outcome.exception())
+        if retry_after is not None:
+            return min(retry_after, self.max_wait)
+        return self.fallback(retry_state)
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open breaker counting consecutive transient failures."""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._consecutive_failures = 0
+        self._opened_at = None
+        self._half_open_trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._half_open_trial:
+                # Let exactly one probe through; everyone else keeps failing fast
+                self._half_open_trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._half_open_trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._half_open_trial or self._consecutive_failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._half_open_trial = False
+
+
+class ResilientCaller:
+    """Jittered exponential retry plus a shared circuit breaker around provider calls.
+
+    Retry counts, time spent waiting between attempts and breaker rejections are kept per
+    operation and exposed through stats().
+    """
+
+    def __init__(self, max_attempts: int = 4, initial_wait: float = 1.0, max_wait: float = 30.0,
+                 circuit_breaker: CircuitBreaker = None):
+        self.max_attempts = max_attempts
+        self.initial_wait = initial_wait
+        self.max_wait = max_wait
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _record(self, operation: str, **increments):
+        with self._lock:
+            metrics = self._metrics.setdefault(operation, {
+                "calls": 0, "attempts": 0, "retries": 0, "retry_wait_seconds": 0.0,
+                "failures": 0, "circuit_rejections": 0
+            })
+            for key, value in increments.items():
+                metrics[key] += value
+
+    def call(self, operation: str, fn: Callable[[], Any]) -> Any:
+        """Run fn with retries; raises CircuitOpenError immediately while the provider is marked down."""
+        self._record(operation, calls=1)
+
+        def attempt():
+            if not self.circuit_breaker.allow_request():
+                self._record(operation, circuit_rejections=1)
+                raise CircuitOpenError(f"LLM provider circuit is open; skipping {operation}")
+            self._record(operation, attempts=1)
+            transient = False
+            try:
+                return fn()
+            except Exception as e:
+                transient = is_retryable(e)
+                raise
+            finally:
+                # Always settle the attempt so a half-open probe never stays claimed. A non-transient
+                # error (e.g. a 400 json_validate_failed) still means the provider answered.
+                if transient:
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.record_success()
+
+        def before_sleep(retry_state):
+            self._record(operation, retries=1, retry_wait_seconds=retry_state.next_action.sleep)
+
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_retry_after(wait_random_exponential(multiplier=self.initial_wait, max=self.max_wait), self.max_wait),
+            retry=retry_if_exception(is_retryable),
+            before_sleep=before_sleep,
+            reraise=True
+        )
+        try:
+            return retrying(attempt)
+        except Exception:
+            self._record(operation, failures=1)
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = {name: dict(values) for name, values in self._metrics.items()}
+        return {"circuit_state": self.circuit_breaker.state, "operations": operations}
+
+
+_default_caller: Optional[ResilientCaller] = None
+_default_caller_lock = threading.Lock()
+
+
+def get_default_resilient_caller() -> ResilientCaller:
+    """Process-wide caller so the circuit breaker sees failures from every processor instance."""
+    global _default_caller
+    with _default_caller_lock:
+        if _default_caller is None:
+            _default_caller = ResilientCaller()
+        return _default_caller
@@ -0,0 +1,224 @@
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, List, Optional
+
+# Lower value = admitted first
+INTERACTIVE = 0
+BATCH = 10
+
+_current_priority: ContextVar = ContextVar("llm_request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Run the enclosed LLM calls at the given scheduler priority (INTERACTIVE or BATCH)."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> int:
+    return _current_priority.get()
+
+
+def parse_reset_duration(value: str) -> float:
+    """Parse Groq reset headers such as '7.66s', '2m59.56s', '1h2m' or '250ms' into seconds."""
+    if value is None:
+        return 0.0
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    seconds = 0.0
+    for amount, unit in re.findall(r'([\d.]+)(ms|h|m|s)', value):
+        amount = float(amount)
+        if unit == 'ms':
+            seconds += amount / 1000
+        elif unit == 'h':
+            seconds += amount * 3600
+        elif unit == 'm':
+            seconds += amount * 60
+        else:
+            seconds += amount
+    return seconds
+
+
+class RateLimitScheduler:
+    """Token-bucket admission control for chat completions shared by every caller in the process.
+
+    Two buckets are kept: one for requests per minute and one for tokens per minute. Each call
+    reserves its estimated prompt tokens plus max_tokens before it is sent, the reservation is
+    reconciled with the reported usage afterwards, and the buckets are clamped to the remaining
+    quota the provider reports in its response headers. Waiting calls are admitted in priority
+    order, so interactive requests overtake queued batch work.
+    """
+
+    def __init__(self, requests_per_minute: int = 30, tokens_per_minute: int = 30000):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_level = float(requests_per_minute)
+        self._token_level = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stats = {
+            "admitted": {INTERACTIVE: 0, BATCH: 0},
+            "queue_wait_seconds": 0.0,
+            "max_queue_depth": 0,
+            "rate_limited_responses": 0
+        }
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict], max_tokens: int) -> int:
+        """Rough token estimate for a request: ~4 characters per prompt token plus the completion budget."""
+        prompt_chars = sum(len(str(message.get("content", ""))) for message in messages)
+        return prompt_chars // 4 + max_tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_level = min(self.requests_per_minute, self._request_level + elapsed * self.requests_per_minute / 60.0)
+        self._token_level = min(self.tokens_per_minute, self._token_level + elapsed * self.tokens_per_minute / 60.0)
+
+    def _admission_delay(self, estimated_tokens: int) -> float:
+        delay = self._paused_until - time.monotonic()
+        if self._request_level < 1:
+            delay = max(delay, (1 - self._request_level) * 60.0 / self.requests_per_minute)
+        if self._token_level < estimated_tokens:
+            delay = max(delay, (estimated_tokens - self._token_level) * 60.0 / self.tokens_per_minute)
+        return max(delay, 0.0)
+
+    def acquire(self, estimated_tokens: int, priority: Optional[int] = None) -> float:
+        """Block until the request may be sent. Returns the time spent queued in seconds."""
+        if priority is None:
+            priority = current_priority()
+        # A single request can never reserve more than a full minute of quota
+        estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+        started = time.monotonic()
+
+        with self._condition:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, entry)
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._waiting))
+            try:
+                while True:
+                    self._refill()
+                    timeout = None
+                    if self._waiting[0] == entry:
+                        timeout = self._admission_delay(estimated_tokens)
+                        if timeout <= 0:
+                            heapq.heappop(self._waiting)
+                            self._request_level -= 1
+                            self._token_level -= estimated_tokens
+                            waited = time.monotonic() - started
+                            self._stats["admitted"][priority] = self._stats["admitted"].get(priority, 0) + 1
+                            self._stats["queue_wait_seconds"] += waited
+                            self._condition.notify_all()
+                            return waited
+                    self._condition.wait(timeout=timeout)
+            except BaseException:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                raise
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token reservation once the provider reports actual usage."""
+        if actual_tokens is None:
+            return
+        with self._condition:
+            self._token_level += min(estimated_tokens, self.tokens_per_minute) - actual_tokens
+            self._condition.notify_all()
+
+    def release(self, estimated_tokens: int):
+        """Return an admitted reservation that was never sent (e.g. a cancelled hedge)."""
+        with self._condition:
+            self._request_level = min(self.requests_per_minute, self._request_level + 1)
+            self._token_level += min(estimated_tokens, self.tokens_per_minute)
+            self._condition.notify_all()
+
+    def update_from_headers(self, headers: Any):
+        """Clamp local buckets to the quota reported in x-ratelimit-* / retry-after response headers."""
+        if not headers:
+            return
+        with self._condition:
+            self._refill()
+            limit_tokens = headers.get("x-ratelimit-limit-tokens")
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            remaining_requests = headers.get("x-ratelimit-remaining-requests")
+            retry_after = headers.get("retry-after")
+
+            try:
+                if limit_tokens is not None:
+                    self.tokens_per_minute = int(limit_tokens)
+                if remaining_tokens is not None:
+                    self._token_level = min(self._token_level, float(remaining_tokens))
+                if remaining_requests is not None:
+                    self._request_level = min(self._request_level, float(remaining_requests))
+            except ValueError:
+                pass
+
+            if remaining_requests is not None and str(remaining_requests) == "0":
+                self._pause_for(parse_reset_duration(headers.get("x-ratelimit-reset-requests")))
+            if remaining_tokens is not None and str(remaining_tokens) == "0":
+                self._pause_for(parse_reset_duration(headers.get("x-ratelimit-reset-tokens")))
+            if retry_after is not None:
+                self._pause_for(parse_reset_duration(retry_after))
+            self._condition.notify_all()
+
+    def on_rate_limited(self, headers: Any):
+        """Record a 429 from the provider and hold back admissions until its quota resets."""
+        with self._condition:
+            self._stats["rate_limited_responses"] += 1
+            self._request_level = min(self._request_level, 0.0)
+        self.update_from_headers(headers)
+
+    def _pause_for(self, seconds: float):
+        if seconds > 0:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            self._refill()
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "available_requests": round(self._request_level, 2),
+                "available_tokens": round(self._token_level, 2),
+                "queue_depth": len(self._waiting),
+                "max_queue_depth": self._stats["max_queue_depth"],
+                "admitted_interactive": self._stats["admitted"].get(INTERACTIVE, 0),
+                "admitted_batch": self._stats["admitted"].get(BATCH, 0),
+                "queue_wait_seconds": round(self._stats["queue_wait_seconds"], 3),
+                "rate_limited_responses": self._stats["rate_limited_responses"]
+            }
+
+
+_default_scheduler: Optional[RateLimitScheduler] = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler() -> RateLimitScheduler:
+    """Process-wide scheduler so every processor instance shares one rate-limit budget."""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RateLimitScheduler(
+                requests_per_minute=int(os.getenv("GROQ_RPM_LIMIT", 30)),
+                tokens_per_minute=int(os.getenv("GROQ_TPM_LIMIT", 30000))
+            )
+        return _default_scheduler
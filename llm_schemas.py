@@ -0,0 +1,212 @@
+from typing import Dict, Any, List
+from jsonschema import Draft7Validator
+
+# JSON schemas for every structured generation call made by DRIForesightProcessor.
+# The schemas only pin down the shape the rest of the app reads; extra keys are allowed
+# so richer model output is never rejected.
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+_ARCHETYPE_OUTCOMES = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["archetype", "outcome_text"],
+        "properties": {
+            "archetype": {"type": "string"},
+            "outcome_text": {"type": "string"}
+        }
+    }
+}
+
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "domain_map": {
+        "type": "object",
+        "required": ["central_domain", "sub_domains"],
+        "properties": {
+            "central_domain": {"type": "string"},
+            "description": {"type": "string"},
+            "sub_domains": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "required": ["name", "issue_areas"],
+                    "properties": {
+                        "name": {"type": "string"},
+                        "description": {"type": "string"},
+                        "relevance": {"type": "string"},
+                        "issue_areas": _STRING_LIST
+                    }
+                }
+            }
+        }
+    },
+    "signals": {
+        "type": "object",
+        "required": ["strong_signals", "weak_signals"],
+        "properties": {
+            "strong_signals": {
+                "type": "array",
+                "items": {"type": "object", "required": ["title", "description"]}
+            },
+            "weak_signals": {
+                "type": "array",
+                "items": {"type": "object", "required": ["title", "description"]}
+            }
+        }
+    },
+    "steepv": {
+        "type": "object",
+        "required": ["Social", "Technological", "Economic", "Environmental", "Political", "Values"],
+        "properties": {
+            "Social": _STRING_LIST,
+            "Technological": _STRING_LIST,
+            "Economic": _STRING_LIST,
+            "Environmental": _STRING_LIST,
+            "Political": _STRING_LIST,
+            "Values": _STRING_LIST
+        }
+    },
+    "ai_suggestions": {
+        "type": "object",
+        "required": ["suggestions"],
+        "properties": {
+            "suggestions": {
+                "type": "array",
+                "items": {"type": "object", "required": ["title", "description"]}
+            }
+        }
+    },
+    "futures_triangle": {
+        "type": "object",
+        "required": ["pull_of_future", "push_of_present", "weight_of_history"],
+        "properties": {
+            "pull_of_future": {"type": "object"},
+            "push_of_present": {"type": "object"},
+            "weight_of_history": {"type": "object"},
+            "key_dynamics": {"type": "object"}
+        }
+    },
+    "interview_analysis": {
+        "type": "object",
+        "required": ["challenges", "opportunities", "visions"],
+        "properties": {
+            "challenges": _STRING_LIST,
+            "opportunities": _STRING_LIST,
+            "visions": _STRING_LIST
+        }
+    },
+    "futures_triangle_2_0": {
+        "type": "object",
+        "required": ["drivers", "uncertainties", "narratives", "enhanced_triangle"],
+        "properties": {
+            "drivers": {
+                "type": "array",
+                "items": {"type": "object", "required": ["name", "description"]}
+            },
+            "uncertainties": {
+                "type": "array",
+                "items": {"type": "object", "required": ["name", "description"]}
+            },
+            "narratives": {
+                "type": "array",
+                "items": {"type": "object", "required": ["name", "description"]}
+            },
+            "enhanced_triangle": {"type": "object"},
+            "strategic_insights": {"type": "object"}
+        }
+    },
+    "baseline_scenario": {
+        "type": "object",
+        "required": ["scenario_title", "scenario_text", "key_assumptions", "scenario_type"],
+        "properties": {
+            "scenario_title": {"type": "string"},
+            "timeframe": {"type": "string"},
+            "scenario_text": {"type": "string"},
+            "key_assumptions": _STRING_LIST,
+            "dominant_drivers": _STRING_LIST,
+            "scenario_type": {"type": "string"}
+        }
+    },
+    "driver_outcomes": {
+        "type": "object",
+        "required": ["driver_outcomes", "uncertainty_outcomes", "narrative_outcomes"],
+        "properties": {
+            "driver_outcomes": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "required": ["driver_name", "outcomes"],
+                    "properties": {"outcomes": _ARCHETYPE_OUTCOMES}
+                }
+            },
+            "uncertainty_outcomes": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "required": ["uncertainty_name", "outcomes"],
+                    "properties": {"outcomes": _ARCHETYPE_OUTCOMES}
+                }
+            },
+            "narrative_outcomes": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "required": ["narrative_name", "outcomes"],
+                    "properties": {"outcomes": _ARCHETYPE_OUTCOMES}
+                }
+            },
+            "cross_archetype_insights": {"type": "object"}
+        }
+    },
+    "scenario": {
+        "type": "object",
+        "required": ["scenario_title", "scenario_text"],
+        "properties": {
+            "scenario_title": {"type": "string"},
+            "archetype": {"type": "string"},
+            "timeframe": {"type": "string"},
+            "scenario_text": {"type": "string"},
+            "key_factors": _STRING_LIST,
+            "critical_assumptions": _STRING_LIST,
+            "probability_assessment": {"type": "string"},
+            "key_indicators": _STRING_LIST
+        }
+    },
+    "wind_tunnel_scenario": {
+        "type": "object",
+        "required": ["viability", "process", "capabilities", "adaptations_needed"],
+        "properties": {
+            "viability": {"type": "string"},
+            "process": {"type": "string"},
+            "capabilities": {"type": "string"},
+            "adaptations_needed": {"type": "string"}
+        }
+    },
+    "cross_scenario": {
+        "type": "object",
+        "required": ["robust_elements", "scenario_specific", "critical_vulnerabilities", "monitoring_indicators"],
+        "properties": {
+            "robust_elements": {"type": "string"},
+            "scenario_specific": {"type": "string"},
+            "critical_vulnerabilities": {"type": "string"},
+            "monitoring_indicators": {"type": "string"}
+        }
+    }
+}
+
+# Validators are compiled once at import so per-call validation stays cheap
+VALIDATORS: Dict[str, Draft7Validator] = {
+    name: Draft7Validator(schema) for name, schema in SCHEMAS.items()
+}
+
+
+def validate_response(schema_name: str, data: Any) -> List[str]:
+    """Validate parsed model output against its schema and return readable error messages."""
+    validator = VALIDATORS.get(schema_name)
+    if validator is None:
+        return []
+    return [
+        f"{'/'.join(str(p) for p in error.absolute_path) or '<root>'}: {error.message}"
+        for error in validator.iter_errors(data)
+    ]
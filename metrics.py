@@ -0,0 +1,345 @@
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from structured_logging import get_logger, logging_stats
+
+log = get_logger("metrics")
+
+# Prometheus' default buckets, for request handling and document extraction
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# LLM calls queue behind the rate limiter and retry, so they need a much longer tail
+LLM_BUCKETS = (0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+KNOWN_FILE_TYPES = {"pdf", "txt", "csv", "docx", "doc", "pptx", "ppt", "jpg", "jpeg", "png", "bmp", "gif"}
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonic count per label set, e.g. requests.inc(route, method, "200")."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in values]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, e.g. requests currently in flight."""
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        # Only the bucket the value falls in is incremented; rendering makes the counts cumulative
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._series.items())
+        lines = []
+        for labels, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(round(total, 6))}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in the Prometheus text exposition format.
+
+    Recording is a dict update under a per-metric lock. Values that other components already
+    track (scheduler queue depth, circuit state, ...) are read by collectors at scrape time, so
+    they cost nothing on the request path.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]):
+        """Add a scrape-time callback yielding (name, type, help, labels, value) samples."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.header())
+            lines.extend(metric.render())
+
+        collected: Dict[str, Tuple[str, str, List[str]]] = {}
+        for collector in collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                # A broken collector must not take the whole scrape down
+                log.error("Metrics collector failed", extra={"error": str(e)})
+                continue
+            for name, kind, documentation, labels, value in samples:
+                entry = collected.setdefault(name, (kind, documentation, []))
+                names, values = tuple(labels), tuple(labels.values())
+                entry[2].append(f"{name}{_format_labels(names, values)} {_format_value(value)}")
+        for name, (kind, documentation, samples) in collected.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "foresight_http_requests_total", "HTTP requests handled, by route, method and status.",
+    ("route", "method", "status"))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "foresight_http_request_duration_seconds", "HTTP request latency by route.", ("route", "method"))
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "foresight_http_requests_in_flight", "HTTP requests currently being handled, by route.", ("route",))
+
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "foresight_llm_call_duration_seconds", "End-to-end structured LLM call latency by generation method and status.",
+    ("operation", "status"), LLM_BUCKETS)
+LLM_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "foresight_llm_queue_wait_seconds", "Time LLM calls spent waiting for rate-limit capacity.",
+    ("operation",), LLM_BUCKETS)
+LLM_TOKENS = REGISTRY.counter(
+    "foresight_llm_tokens_total", "LLM tokens used, by generation method and kind (prompt or completion).",
+    ("operation", "kind"))
+LLM_ATTEMPTS = REGISTRY.counter(
+    "foresight_llm_attempts_total", "LLM requests sent, including retries and hedges.", ("operation",))
+STRUCTURED_OUTPUTS = REGISTRY.counter(
+    "foresight_llm_structured_outputs_total",
+    "Structured LLM responses by generation method and result (ok, parse_failure or schema_failure).",
+    ("operation", "result"))
+
+CACHE_LOOKUPS = REGISTRY.counter(
+    "foresight_cache_lookups_total", "Cache lookups by cache and result (hit or miss).", ("cache", "result"))
+
+JOBS_IN_FLIGHT = REGISTRY.gauge(
+    "foresight_jobs_in_flight", "Long-running jobs currently executing, by kind.", ("kind",))
+POOL_WORKERS = REGISTRY.gauge(
+    "foresight_pool_workers", "Worker pool capacity across live pools.", ("pool",))
+POOL_BUSY_WORKERS = REGISTRY.gauge(
+    "foresight_pool_busy_workers", "Workers currently running a task; busy / capacity is pool saturation.", ("pool",))
+POOL_QUEUED_TASKS = REGISTRY.gauge(
+    "foresight_pool_queued_tasks", "Tasks submitted to a pool that are waiting for a worker.", ("pool",))
+
+UPLOAD_BYTES = REGISTRY.counter(
+    "foresight_upload_bytes_total", "Bytes of uploaded documents processed, by file type.", ("file_type",))
+EXTRACTION_SECONDS = REGISTRY.histogram(
+    "foresight_extraction_duration_seconds", "Text extraction time per document, by file type.", ("file_type",))
+
+
+def file_type_label(filename: str) -> str:
+    """Bounded file-type label so arbitrary extensions cannot blow up series cardinality."""
+    extension = (filename or "").rsplit(".", 1)[-1].lower() if "." in (filename or "") else ""
+    return extension if extension in KNOWN_FILE_TYPES else "other"
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.inc(cache, "hit" if hit else "miss")
+
+
+def observe_llm_call(record: Dict) -> None:
+    """Fold one LLM ledger record into the LLM histograms and counters."""
+    operation = record["operation"]
+    LLM_CALL_SECONDS.observe(record["total_seconds"], operation, record["status"])
+    if record["attempts"]:
+        LLM_QUEUE_WAIT_SECONDS.observe(record["queue_wait_seconds"], operation)
+        LLM_ATTEMPTS.inc(operation, amount=record["attempts"])
+    if record["prompt_tokens"]:
+        LLM_TOKENS.inc(operation, "prompt", amount=record["prompt_tokens"])
+    if record["completion_tokens"]:
+        LLM_TOKENS.inc(operation, "completion", amount=record["completion_tokens"])
+
+
+class PoolTracker:
+    """Count a pool's capacity while it is alive and its tasks as queued, then busy.
+
+        with ThreadPoolExecutor(max_workers=n) as pool, PoolTracker("stage", n) as tracker:
+            tracker.submitted()
+            pool.submit(tracker.run, fn, *args)
+    """
+
+    def __init__(self, pool: str, workers: int):
+        self.pool = pool
+        self.workers = workers
+
+    def __enter__(self):
+        POOL_WORKERS.inc(self.pool, amount=self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        POOL_WORKERS.dec(self.pool, amount=self.workers)
+
+    def submitted(self):
+        POOL_QUEUED_TASKS.inc(self.pool)
+
+    def run(self, fn: Callable, *args, **kwargs):
+        POOL_QUEUED_TASKS.dec(self.pool)
+        POOL_BUSY_WORKERS.inc(self.pool)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            POOL_BUSY_WORKERS.dec(self.pool)
+
+
+def llm_component_samples():
+    """Scrape-time samples from the process-wide rate-limit scheduler, circuit breaker, hedging policy and coalescer."""
+    from llm_scheduler import get_default_scheduler
+    from llm_resilience import get_default_resilient_caller
+    from llm_hedging import get_default_hedging_policy
+    from llm_coalescing import get_default_single_flight
+
+    scheduler = get_default_scheduler().stats()
+    yield ("foresight_llm_scheduler_queue_depth", "gauge",
+           "LLM calls waiting for rate-limit capacity.", {}, scheduler["queue_depth"])
+    yield ("foresight_llm_scheduler_available_requests", "gauge",
+           "Requests left in the rate-limit budget.", {}, scheduler["available_requests"])
+    yield ("foresight_llm_rate_limited_responses_total", "counter",
+           "429 responses received from the LLM provider.", {}, scheduler["rate_limited_responses"])
+
+    resilience = get_default_resilient_caller().stats()
+    for state in ("closed", "open", "half_open"):
+        yield ("foresight_llm_circuit_state", "gauge", "1 for the LLM circuit breaker's current state.",
+               {"state": state}, 1 if resilience["circuit_state"] == state else 0)
+    for operation, values in resilience["operations"].items():
+        yield ("foresight_llm_retries_total", "counter", "LLM retries by generation method.",
+               {"operation": operation}, values.get("retries", 0))
+        yield ("foresight_llm_retry_wait_seconds_total", "counter",
+               "Time spent backing off between LLM retries, by generation method.",
+               {"operation": operation}, values.get("retry_wait_seconds", 0.0))
+
+    hedging = get_default_hedging_policy()
+    if hedging is not None:
+        hedges = hedging.stats()
+        yield ("foresight_llm_hedged_calls_total", "counter", "LLM calls made under the hedging policy.",
+               {}, hedges["calls"])
+        yield ("foresight_llm_hedges_total", "counter", "Duplicate LLM requests launched past the latency percentile.",
+               {}, hedges["hedges_fired"])
+        yield ("foresight_llm_hedge_wins_total", "counter", "Hedged LLM requests that answered before the original.",
+               {}, hedges["hedge_wins"])
+        yield ("foresight_llm_hedge_win_rate", "gauge", "Share of launched hedges that won the race.",
+               {}, hedges["hedge_win_rate"])
+
+    yield ("foresight_llm_requests_in_flight", "gauge", "Distinct LLM requests currently in flight.",
+           {}, get_default_single_flight().stats()["in_flight"])
+
+
+REGISTRY.register_collector(llm_component_samples)
+
+
+def logging_samples():
+    stats = logging_stats()
+    yield ("foresight_log_records_dropped_total", "counter",
+           "Log records dropped because the log queue was full.", {}, stats["dropped"])
+    yield ("foresight_log_records_sampled_out_total", "counter",
+           "High-volume log records skipped by sampling.", {}, stats["sampled_out"])
+
+
+REGISTRY.register_collector(logging_samples)
+
+
+@contextmanager
+def track_job(kind: str):
+    """Count the enclosed long-running job (e.g. "stress_test") as in flight."""
+    JOBS_IN_FLIGHT.inc(kind)
+    try:
+        yield
+    finally:
+        JOBS_IN_FLIGHT.dec(kind)
@@ -0,0 +1,398 @@
+"""
+Local OpenAI/Groq-compatible chat completions server for load and latency testing.
+
+    python mock_llm_server.py --port 8085 --latency 0.8 --jitter 0.4 --error-rate 0.02 --rate-limit-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8085 GROQ_API_KEY=mock python app.py
+
+Every response is schema-valid JSON for the prompt family it recognises from the system
+prompt (see llm_schemas), so the whole app runs end to end without network access.
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from llm_schemas import validate_response
+
+ARCHETYPES = ["Collapse", "New Equilibrium", "Transformation"]
+
+# (system prompt fragment, schema name); first match wins, so more specific fragments come first
+PROMPT_FAMILIES: List[Tuple[str, str]] = [
+    ("domain mapping", "domain_map"),
+    ("comprehensive signal detection", "signals"),
+    ("STEEPV", "steepv"),
+    ("signal detection and strategic foresight", "ai_suggestions"),
+    ("Futures Triangle 2.0", "futures_triangle_2_0"),
+    ("Futures Triangle methodology", "futures_triangle"),
+    ("interview analysis", "interview_analysis"),
+    ("baseline scenario", "baseline_scenario"),
+    ("archetypal scenario", "driver_outcomes"),
+    ("Wind Tunnel", "wind_tunnel_scenario"),
+    ("cross-scenario synthesis", "cross_scenario"),
+    ("scenario", "scenario"),
+]
+
+
+def _sentence(rng: random.Random, topic: str, words: int = 24) -> str:
+    vocabulary = ["policy", "investment", "capacity", "community", "regulation", "technology", "funding",
+                  "participation", "infrastructure", "resilience", "demand", "governance", "skills", "data"]
+    return f"{topic}: " + " ".join(rng.choice(vocabulary) for _ in range(words)) + "."
+
+
+def _paragraphs(rng: random.Random, topic: str, count: int = 3) -> str:
+    return "\n\n".join(" ".join(_sentence(rng, f"{topic} {i + 1}.{j + 1}") for j in range(4)) for i in range(count))
+
+
+def _items(rng: random.Random, topic: str, count: int = 3, words: int = 10) -> List[str]:
+    return [_sentence(rng, f"{topic} {i + 1}", words) for i in range(count)]
+
+
+def _outcomes(rng: random.Random, subject: str, **extra) -> List[Dict[str, Any]]:
+    return [dict({"archetype": archetype, "outcome_text": _sentence(rng, f"{subject} under {archetype}")}, **extra)
+            for archetype in ARCHETYPES]
+
+
+def _scenario_archetype(rng: random.Random, prompt: str) -> str:
+    match = re.search(r"ARCHETYPE: (.+?) -", prompt) or re.search(r"for (.+?) archetype", prompt)
+    return match.group(1).strip() if match else rng.choice(ARCHETYPES)
+
+
+# Builders follow the JSON examples in main.py's prompts, so downstream code sees realistic fields
+RESPONSE_BUILDERS: Dict[str, Callable[[random.Random, str], Dict[str, Any]]] = {
+    "domain_map": lambda rng, prompt: {
+        "central_domain": "Mock Domain",
+        "description": _sentence(rng, "Domain overview"),
+        "sub_domains": [
+            {"name": f"Sub-domain {i + 1}", "description": _sentence(rng, "Sub-domain"),
+             "relevance": rng.choice(["High", "Medium", "Low"]),
+             "issue_areas": _items(rng, "Issue area", 8, 6)}
+            for i in range(6)
+        ]
+    },
+    "signals": lambda rng, prompt: {
+        "strong_signals": [{"title": f"Strong signal {i + 1}", "description": _sentence(rng, "Evidence"),
+                            "source": "documents", "impact": _sentence(rng, "Impact", 8),
+                            "evidence_strength": "Strong"} for i in range(6)],
+        "weak_signals": [{"title": f"Weak signal {i + 1}", "description": _sentence(rng, "Emerging"),
+                          "source": "cross-source pattern", "potential": _sentence(rng, "Potential", 8),
+                          "evidence_strength": "Moderate"} for i in range(6)]
+    },
+    "steepv": lambda rng, prompt: {
+        category: _items(rng, f"{category} factor", 5, 16)
+        for category in ["Social", "Technological", "Economic", "Environmental", "Political", "Values"]
+    },
+    "ai_suggestions": lambda rng, prompt: {
+        "suggestions": [{"title": f"Suggested signal {i + 1}", "description": _sentence(rng, "Suggestion"),
+                         "type": rng.choice(["strong", "weak"])} for i in range(5)]
+    },
+    "futures_triangle": lambda rng, prompt: {
+        "pull_of_future": {"weak_signals": _items(rng, "Weak signal"), "emerging_issues": _items(rng, "Emerging issue"),
+                           "visions_and_aspirations": _items(rng, "Vision", 4)},
+        "push_of_present": {"current_trends": _items(rng, "Trend"), "strong_drivers": _items(rng, "Driver")},
+        "weight_of_history": {"barriers_and_inertia": _items(rng, "Barrier", 4), "values_to_preserve": _items(rng, "Value")},
+        "key_dynamics": {"primary_tensions": _items(rng, "Tension"), "alignment_opportunities": _items(rng, "Alignment"),
+                         "critical_uncertainties": _items(rng, "Uncertainty")}
+    },
+    "interview_analysis": lambda rng, prompt: {
+        key: _items(rng, key.title(), 4, 12) for key in ["challenges", "opportunities", "visions"]
+    },
+    "futures_triangle_2_0": lambda rng, prompt: {
+        "drivers": [{"id": f"D{i + 1}", "name": f"Driver {i + 1}", "description": _sentence(rng, "Driver"),
+                     "category": rng.choice(["Technological", "Economic", "Social", "Political"]),
+                     "impact_level": rng.choice(["High", "Medium"]), "certainty": rng.choice(["High", "Medium"]),
+                     "current_trajectory": _sentence(rng, "Trajectory", 8), "source_evidence": "Mock evidence"}
+                    for i in range(5)],
+        "uncertainties": [{"id": f"U{i + 1}", "name": f"Uncertainty {i + 1}", "description": _sentence(rng, "Uncertainty"),
+                           "key_variables": _items(rng, "Variable", 3, 4), "possible_outcomes": _items(rng, "Outcome", 3, 6),
+                           "impact_on_scenarios": _sentence(rng, "Impact", 10), "source_evidence": "Mock evidence"}
+                          for i in range(4)],
+        "narratives": [{"id": f"N{i + 1}", "type": rng.choice(["Dominant", "Emerging", "Alternative"]),
+                        "name": f"Narrative {i + 1}", "description": _sentence(rng, "Narrative"),
+                        "supporting_evidence": _items(rng, "Evidence", 2, 6), "influence_areas": _items(rng, "Area", 2, 3),
+                        "alternative_versions": _items(rng, "Alternative", 2, 6), "source_context": "Mock context"}
+                       for i in range(3)],
+        "enhanced_triangle": {
+            "pull_of_future": {"weak_signals": _items(rng, "Weak signal"), "emerging_issues": _items(rng, "Emerging issue"),
+                               "visions_aspirations": _items(rng, "Vision")},
+            "push_of_present": {"trends": _items(rng, "Trend"), "drivers": _items(rng, "Driver")},
+            "weight_of_history": {"barriers_inertia": _items(rng, "Barrier"), "values_to_maintain": _items(rng, "Value")},
+            "key_dynamics": {"primary_tensions": _items(rng, "Tension"), "alignment_opportunities": _items(rng, "Alignment", 2),
+                             "critical_uncertainties": _items(rng, "Uncertainty", 2)}
+        },
+        "strategic_insights": {"leverage_points": _items(rng, "Leverage point"), "signals_to_monitor": _items(rng, "Signal", 2),
+                               "values_to_protect": _items(rng, "Value", 2)}
+    },
+    "baseline_scenario": lambda rng, prompt: {
+        "scenario_title": "Mock Baseline Future",
+        "timeframe": "2025-2030",
+        "scenario_text": _paragraphs(rng, "Baseline", 4),
+        "key_assumptions": _items(rng, "Assumption"),
+        "dominant_drivers": [f"Driver {i + 1}" for i in range(3)],
+        "scenario_type": "Baseline"
+    },
+    "driver_outcomes": lambda rng, prompt: {
+        "driver_outcomes": [{"driver_id": f"D{i + 1}", "driver_name": f"Driver {i + 1}",
+                             "baseline_trajectory": _sentence(rng, "Baseline", 8),
+                             "outcomes": _outcomes(rng, f"Driver {i + 1}", key_impacts=_items(rng, "Impact", 3, 4))}
+                            for i in range(5)],
+        "uncertainty_outcomes": [{"uncertainty_id": f"U{i + 1}", "uncertainty_name": f"Uncertainty {i + 1}",
+                                  "key_variables": _items(rng, "Variable", 2, 3),
+                                  "outcomes": _outcomes(rng, f"Uncertainty {i + 1}", resolution_direction="Mock direction")}
+                                 for i in range(4)],
+        "narrative_outcomes": [{"narrative_id": f"N{i + 1}", "narrative_name": f"Narrative {i + 1}",
+                                "narrative_type": "Dominant",
+                                "outcomes": _outcomes(rng, f"Narrative {i + 1}", narrative_shift="Mock shift")}
+                               for i in range(3)],
+        "cross_archetype_insights": {"collapse_patterns": _items(rng, "Collapse pattern", 2),
+                                     "equilibrium_patterns": _items(rng, "Equilibrium pattern", 2),
+                                     "transformation_patterns": _items(rng, "Transformation pattern", 2),
+                                     "leverage_points": _items(rng, "Leverage point", 2)}
+    },
+    "scenario": lambda rng, prompt: {
+        "scenario_title": f"Mock Scenario {rng.randint(1, 9999)}",
+        "archetype": _scenario_archetype(rng, prompt),
+        "timeframe": "2025-2030",
+        "scenario_text": _paragraphs(rng, "Scenario", 4),
+        "key_factors": _items(rng, "Factor", 5, 6),
+        "critical_assumptions": _items(rng, "Assumption", 3, 6),
+        "probability_assessment": f"{rng.choice(['Low', 'Medium', 'High'])} - mock justification",
+        "key_indicators": _items(rng, "Indicator", 3, 6)
+    },
+    "wind_tunnel_scenario": lambda rng, prompt: {
+        key: " ".join(_sentence(rng, key.replace("_", " ").title(), 24) for _ in range(4))
+        for key in ["viability", "process", "capabilities", "adaptations_needed"]
+    },
+    "cross_scenario": lambda rng, prompt: {
+        key: " ".join(_sentence(rng, key.replace("_", " ").title(), 24) for _ in range(4))
+        for key in ["robust_elements", "scenario_specific", "critical_vulnerabilities", "monitoring_indicators"]
+    },
+}
+
+
+def prompt_family(messages: List[Dict[str, Any]]) -> Optional[str]:
+    """Schema name for a request, recognised from its system prompt."""
+    system = " ".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+    for fragment, schema_name in PROMPT_FAMILIES:
+        if fragment.lower() in system.lower():
+            return schema_name
+    return None
+
+
+class MockLLMBehaviour:
+    """Latency, throughput and failure injection settings shared by all request handlers.
+
+    latency: mean seconds before the first token; distribution is "fixed", "uniform" (mean +/- jitter),
+    "normal" (stddev jitter) or "lognormal" (long tail, stddev jitter). tokens_per_second adds
+    output generation time. error_rate returns 500s, rate_limit_rate returns 429s with
+    Retry-After, and rpm_limit enforces a real requests-per-minute quota with x-ratelimit headers.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.0, distribution: str = "fixed",
+                 tokens_per_second: float = None, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 rpm_limit: int = None, retry_after: float = 1.0, seed: int = None):
+        if distribution not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rpm_limit = rpm_limit
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._recent = deque()
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "completed": 0, "errors_injected": 0, "rate_limited": 0,
+                       "unknown_family": 0, "families": {}}
+
+    def sample_latency(self) -> float:
+        with self._lock:
+            if self.distribution == "uniform":
+                value = self._rng.uniform(self.latency - self.jitter, self.latency + self.jitter)
+            elif self.distribution == "normal":
+                value = self._rng.gauss(self.latency, self.jitter)
+            elif self.distribution == "lognormal" and self.latency > 0:
+                # Parameterised so the mean and standard deviation match latency / jitter
+                sigma2 = math.log(1 + (self.jitter / self.latency) ** 2)
+                value = self._rng.lognormvariate(math.log(self.latency) - sigma2 / 2, math.sqrt(sigma2))
+            else:
+                value = self.latency
+        return max(0.0, value)
+
+    def admit(self) -> Tuple[Optional[int], Dict[str, str]]:
+        """Decide the fate of a request: (None, headers) to serve it, or (status, headers) to fail it."""
+        with self._lock:
+            self._stats["requests"] += 1
+            now = time.monotonic()
+            headers = {}
+            if self.rpm_limit:
+                while self._recent and now - self._recent[0] >= 60:
+                    self._recent.popleft()
+                remaining = self.rpm_limit - len(self._recent)
+                reset = 60 - (now - self._recent[0]) if self._recent else 0.0
+                headers = {"x-ratelimit-limit-requests": str(self.rpm_limit),
+                           "x-ratelimit-remaining-requests": str(max(0, remaining - 1)),
+                           "x-ratelimit-reset-requests": f"{reset:.2f}s"}
+                if remaining <= 0:
+                    self._stats["rate_limited"] += 1
+                    return 429, dict(headers, **{"retry-after": f"{max(reset, 0.1):.2f}"})
+            if self._rng.random() < self.rate_limit_rate:
+                self._stats["rate_limited"] += 1
+                return 429, dict(headers, **{"retry-after": str(self.retry_after)})
+            if self._rng.random() < self.error_rate:
+                self._stats["errors_injected"] += 1
+                return 500, headers
+            if self.rpm_limit:
+                self._recent.append(now)
+            return None, headers
+
+    def build_content(self, family: Optional[str], prompt: str) -> str:
+        with self._lock:
+            if family is None:
+                self._stats["unknown_family"] += 1
+            else:
+                self._stats["families"][family] = self._stats["families"].get(family, 0) + 1
+            seed = self._rng.random()
+        if family is None:
+            return json.dumps({"message": "mock response"})
+        return json.dumps(RESPONSE_BUILDERS[family](random.Random(seed), prompt))
+
+    def record_completed(self):
+        with self._lock:
+            self._stats["completed"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["families"] = dict(self._stats["families"])
+        return stats
+
+
+class MockLLMRequestHandler(BaseHTTPRequestHandler):
+    behaviour: MockLLMBehaviour = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep load tests quiet; stats are available from GET /stats
+        pass
+
+    def _send_json(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            self._send_json(200, self.behaviour.stats())
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request_body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+
+        behaviour = self.behaviour
+        status, headers = behaviour.admit()
+        if status == 429:
+            self._send_json(429, {"error": {"message": "Rate limit reached (mock)", "type": "tokens",
+                                            "code": "rate_limit_exceeded"}}, headers)
+            return
+
+        time.sleep(behaviour.sample_latency())
+        if status == 500:
+            self._send_json(500, {"error": {"message": "Injected server error (mock)", "type": "internal_server_error"}},
+                            headers)
+            return
+
+        messages = request_body.get("messages") or []
+        prompt = "\n".join(m.get("content") or "" for m in messages if m.get("role") == "user")
+        content = behaviour.build_content(prompt_family(messages), prompt)
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        completion_tokens = len(content) // 4
+        if behaviour.tokens_per_second:
+            time.sleep(completion_tokens / behaviour.tokens_per_second)
+
+        behaviour.record_completed()
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request_body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        }, headers)
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, **behaviour_kwargs) -> Tuple[ThreadingHTTPServer, str]:
+    """Serve in a background thread; returns (server, base_url). Stop with server.shutdown()."""
+    handler = type("Handler", (MockLLMRequestHandler,), {"behaviour": MockLLMBehaviour(**behaviour_kwargs)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-llm", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def check_response_builders() -> List[str]:
+    """Validate every canned response against its schema; returns the problems found."""
+    problems = []
+    for family, build in RESPONSE_BUILDERS.items():
+        problems.extend(f"{family}: {error}" for error in validate_response(family, build(random.Random(0), "")))
+    return problems
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description="Mock Groq/OpenAI chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8085)
+    parser.add_argument("--latency", type=float, default=0.5, help="mean seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="spread of the latency distribution")
+    parser.add_argument("--distribution", choices=["fixed", "uniform", "normal", "lognormal"], default="lognormal")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--rpm-limit", type=int, default=None, help="enforce a requests-per-minute quota")
+    parser.add_argument("--retry-after", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    problems = check_response_builders()
+    if problems:
+        raise SystemExit("Canned responses do not match llm_schemas:\n" + "\n".join(problems))
+
+    server, base_url = start_mock_server(
+        args.host, args.port, latency=args.latency, jitter=args.jitter, distribution=args.distribution,
+        tokens_per_second=args.tokens_per_second, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, rpm_limit=args.rpm_limit, retry_after=args.retry_after, seed=args.seed
+    )
+    print(f"Mock LLM server listening on {base_url} (set GROQ_BASE_URL={base_url})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,232 @@
+import os
+import time
+import uuid
 from typing import Dict, Any, List
 from main import DRIForesightProcessor
+from llm_scheduler import request_priority, BATCH
+from llm_ledger import llm_call_tags
+from metrics import track_job
+from stage_graph import Stage, StageGraphExecutor, StageGraphError, content_hash, plan_from_checkpoints
+from checkpoint_store import CheckpointStore
 import json
 
+# Alternative scenario archetypes generated by the stress test (one scenario each)
+SCENARIO_ARCHETYPES = {
+    "collapse": "Collapse",
+    "new_equilibrium": "New Equilibrium",
+    "transformation": "Transformation"
+}
+
 class PolicyStressTestProcessor:
-    def __init__(self, processor: DRIForesightProcessor):
+    def __init__(self, processor: DRIForesightProcessor, max_concurrency: int = 4, checkpoint_store: CheckpointStore = None):
         self.processor = processor
+        self.max_concurrency = max_concurrency
+        self.checkpoint_store = checkpoint_store
         
-    def run_comprehensive_analysis(self, domain: str, project_name: str, document_text: str) -> Dict[str, Any]:
+    def run_comprehensive_analysis(self, domain: str, project_name: str, document_text: str, run_id: str = None) -> Dict[str, Any]:
         """
         Run complete stress test analysis combining all phases.
         Returns comprehensive results for display in single view.
+        LLM calls are queued at batch priority so interactive requests are served first,
+        and are tagged with the project in the LLM ledger.
+        With a checkpoint store, every completed stage is saved under run_id; reusing a run_id
+        with different inputs replaces the run's manifest, so later resumes use the new inputs.
+        """
+        run_id = run_id or uuid.uuid4().hex
+        if self.checkpoint_store is not None and not self._manifest_matches(
+                self.checkpoint_store.load_manifest(run_id), domain, project_name, document_text):
+            self.checkpoint_store.save_manifest(run_id, {
+                "domain": domain,
+                "project_name": project_name,
+                "document_text": document_text,
+                "created_at": time.time()
+            })
+
+        with request_priority(BATCH), llm_call_tags(project=project_name), track_job("stress_test"):
+            return self._run_comprehensive_analysis(domain, project_name, document_text, run_id)
+
+    def resume_comprehensive_analysis(self, run_id: str) -> Dict[str, Any]:
+        """
+        Resume a checkpointed run: completed stages are restored, failed or invalidated
+        stages (and everything downstream of them) are executed again.
+        """
+        manifest = self._load_manifest(run_id)
+        return self.run_comprehensive_analysis(
+            manifest["domain"], manifest["project_name"], manifest["document_text"], run_id=run_id
+        )
+
+    def stale_stages(self, run_id: str, inputs: Dict[str, Any] = None) -> List[str]:
+        """
+        Stages of a checkpointed run that must be recomputed, in dependency order.
+        inputs (domain, project_name, document_text) default to the run's manifest.
+        """
+        plan = self._plan(run_id, inputs or self._load_manifest(run_id))
+        return [name for name, entry in plan.items() if entry["stale"]]
+
+    def update_stage_output(self, run_id: str, stage_name: str, output: Any) -> List[str]:
+        """
+        Replace a stage's checkpointed output with a user-edited version.
+        Stages downstream of the edit are invalidated (their input hashes no longer match)
+        and recomputed by the next resume; untouched branches stay restorable.
+        Returns the stages that are now stale.
+        """
+        manifest = self._load_manifest(run_id)
+        plan = self._plan(run_id, manifest)
+        if stage_name not in plan:
+            raise ValueError(f"Unknown stage: {stage_name}")
+        if plan[stage_name]["input_hash"] is None:
+            raise ValueError(f"Stage '{stage_name}' depends on stages that must be recomputed first")
+
+        self.checkpoint_store.save(run_id, stage_name, plan[stage_name]["input_hash"], output)
+        return [name for name, entry in self._plan(run_id, manifest).items() if entry["stale"]]
+
+    def _load_manifest(self, run_id: str) -> Dict[str, Any]:
+        if self.checkpoint_store is None:
+            raise ValueError("Checkpointed runs require a checkpoint store")
+        manifest = self.checkpoint_store.load_manifest(run_id)
+        if manifest is None:
+            raise ValueError(f"No checkpointed run found for run_id {run_id}")
+        return manifest
+
+    def _plan(self, run_id: str, manifest: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        domain, project_name, document_text = manifest["domain"], manifest["project_name"], manifest["document_text"]
+        return plan_from_checkpoints(
+            self._build_stages(domain, project_name, document_text),
+            self.checkpoint_store,
+            run_id,
+            self._fingerprint(domain, project_name, document_text)
+        )
+
+    @staticmethod
+    def _fingerprint(domain: str, project_name: str, document_text: str) -> str:
+        return content_hash([domain, project_name, document_text])
+
+    @classmethod
+    def _manifest_matches(cls, manifest: Dict[str, Any], domain: str, project_name: str, document_text: str) -> bool:
+        if manifest is None:
+            return False
+        stored = cls._fingerprint(manifest.get("domain"), manifest.get("project_name"), manifest.get("document_text"))
+        return stored == cls._fingerprint(domain, project_name, document_text)
+
+    def _run_comprehensive_analysis(self, domain: str, project_name: str, document_text: str, run_id: str) -> Dict[str, Any]:
+        """
+        Execute framing, scanning and futuring as a dependency graph of stages.
+        Each stage starts as soon as its inputs are ready (e.g. the domain map and signals run
+        side by side), with at most max_concurrency stages in flight.
         """
         results = {
+            "run_id": run_id,
             "project_name": project_name,
             "domain": domain,
             "framing_results": {},
             "scanning_results": {},
             "futuring_results": {},
+            "stage_timings": {},
             "processing_status": "starting"
         }
         
         try:
-            # Phase 1: Framing Analysis
-            results["processing_status"] = "framing"
-            framing_data = self._run_framing_phase(domain, project_name, document_text)
-            results["framing_results"] = framing_data
-            
-            # Phase 2: Scanning Analysis  
-            results["processing_status"] = "scanning"
-            scanning_data = self._run_scanning_phase(domain, document_text)
-            results["scanning_results"] = scanning_data
-            
-            # Phase 3: Futuring Analysis
-            results["processing_status"] = "futuring"
-            futuring_data = self._run_futuring_phase(domain, scanning_data, document_text)
-            results["futuring_results"] = futuring_data
-            
+            results["processing_status"] = "running"
+            stages = self._build_stages(domain, project_name, document_text)
+            stage_results, timings = StageGraphExecutor(self.max_concurrency).run(
+                stages,
+                checkpoints=self.checkpoint_store,
+                run_id=run_id,
+                # Checkpoints from a run with different inputs are never reused
+                fingerprint=self._fingerprint(domain, project_name, document_text),
+                is_failed_output=self._is_failed_output
+            )
+
+            results["framing_results"] = stage_results["framing"]
+            results["scanning_results"] = self._assemble_scanning_results(stage_results)
+            results["futuring_results"] = self._assemble_futuring_results(stage_results)
+            results["stage_timings"] = timings
             results["processing_status"] = "completed"
             return results
+
+        except StageGraphError as e:
+            results["processing_status"] = "error"
+            results["error"] = str(e.error)
+            results["failed_stage"] = e.stage
+            results["stage_timings"] = getattr(e, "timings", {})
+            return results
             
         except Exception as e:
             results["processing_status"] = "error"
             results["error"] = str(e)
             return results
+
+    def _build_stages(self, domain: str, project_name: str, document_text: str) -> List[Stage]:
+        """Describe the stress test pipeline; each stage declares only the artifacts it reads."""
+        processor = self.processor
+        phase1_data = {"project_name": domain, "final_domain": domain}
+
+        stages = [
+            # Phase 1: Framing
+            Stage("framing", lambda: self._run_framing_phase(domain, project_name, document_text)),
+
+            # Phase 2: Scanning
+            Stage("signals", lambda: processor.generate_signals(domain, document_text)),
+            Stage("steepv",
+                  lambda signals: processor.generate_steepv_analysis(domain, signals, document_text),
+                  depends_on=["signals"]),
+            Stage("futures_triangle",
+                  lambda signals, steepv: processor.generate_futures_triangle(domain, signals, steepv, document_text),
+                  depends_on=["signals", "steepv"]),
+
+            # Phase 3: Futuring
+            Stage("futures_triangle_2_0",
+                  lambda signals, steepv, futures_triangle: processor.generate_futures_triangle_2_0(
+                      domain, phase1_data, self._phase2_data(signals, steepv, futures_triangle), document_text),
+                  depends_on=["signals", "steepv", "futures_triangle"]),
+            Stage("baseline_scenario",
+                  lambda futures_triangle_2_0: processor.generate_baseline_scenario(domain, futures_triangle_2_0, phase1_data),
+                  depends_on=["futures_triangle_2_0"]),
+            Stage("driver_outcomes",
+                  lambda futures_triangle_2_0, baseline_scenario: processor.generate_driver_outcomes(
+                      domain, futures_triangle_2_0, baseline_scenario, phase1_data),
+                  depends_on=["futures_triangle_2_0", "baseline_scenario"])
+        ]
+
+        # Alternative scenarios (1 of each type) are independent of each other
+        for key, archetype in SCENARIO_ARCHETYPES.items():
+            stages.append(Stage(
+                f"scenario_{key}",
+                lambda baseline_scenario, driver_outcomes, futures_triangle_2_0, archetype=archetype:
+                    processor.generate_alternative_scenarios(
+                        domain, {archetype: 1}, baseline_scenario, driver_outcomes, futures_triangle_2_0),
+                depends_on=["baseline_scenario", "driver_outcomes", "futures_triangle_2_0"]
+            ))
+
+        return stages
+
+    @staticmethod
+    def _is_failed_output(output: Any) -> bool:
+        """
+        Generation methods report failures as {"error": ...} or return placeholder data marked
+        "fallback" (STEEPV, alternative scenarios); neither is checkpointed, so resume retries them.
+        """
+        if not isinstance(output, dict):
+            return False
+        if "error" in output or output.get("fallback"):
+            return True
+        scenarios = output.get("scenarios")
+        return isinstance(scenarios, list) and any(
+            isinstance(scenario, dict) and scenario.get("fallback") for scenario in scenarios)
+
+    @staticmethod
+    def _signals_summary(signals_data: Dict) -> Dict[str, Any]:
+        return {
+            "strong_signals": signals_data.get('strong_signals', []),
+            "weak_signals": signals_data.get('weak_signals', [])
+        }
+
+    def _phase2_data(self, signals_data: Dict, steepv_data: Dict, futures_triangle: Dict) -> Dict[str, Any]:
+        return {
+            "signals_data": self._signals_summary(signals_data),
+            "steepv_data": steepv_data,
+            "futures_triangle_data": futures_triangle
+        }
     
     # def _run_framing_phase(self, domain: str, project_name: str, document_text: str) -> Dict[str, Any]:
     #     """Execute framing phase analysis."""
@@ -85,7 +269,7 @@ class PolicyStressTestProcessor:
         central_domain = domain_map.get('central_domain', domain)
         sub_domains = domain_map.get('sub_domains', [])
         
-        return {
+        framing_data = {
             "domain_map": {
                 "central_domain": central_domain,
                 "sub_domains": [
@@ -101,66 +285,36 @@ class PolicyStressTestProcessor:
             "document_analyzed": has_substantial_content,
             "success": True
         }
+        if 'error' in domain_map:
+            framing_data["error"] = domain_map['error']
+        return framing_data
     
-    def _run_scanning_phase(self, domain: str, document_text: str) -> Dict[str, Any]:
-        """Execute scanning phase analysis."""
-        # Generate Signals
-        signals_data = self.processor.generate_signals(domain, document_text)
-        
-        # Generate STEEPV Analysis
-        steepv_data = self.processor.generate_steepv_analysis(domain, signals_data, document_text)
-        
-        # Generate Futures Triangle
-        futures_triangle = self.processor.generate_futures_triangle(domain, signals_data, steepv_data, document_text)
-        
+    def _assemble_scanning_results(self, stage_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Scanning phase results in the shape the views expect."""
         return {
-            "signals": {
-                "strong_signals": signals_data.get('strong_signals', []),
-                "weak_signals": signals_data.get('weak_signals', [])
-            },
-            "steepv_analysis": steepv_data,
-            "futures_triangle": futures_triangle,
+            "signals": self._signals_summary(stage_results["signals"]),
+            "steepv_analysis": stage_results["steepv"],
+            "futures_triangle": stage_results["futures_triangle"],
             "success": True
         }
     
-    def _run_futuring_phase(self, domain: str, scanning_data: Dict, document_text: str) -> Dict[str, Any]:
-        """Execute futuring phase analysis."""
-        # Phase data preparation
-        phase1_data = {"project_name": domain, "final_domain": domain}
-        phase2_data = {
-            "signals_data": scanning_data.get("signals", {}),
-            "steepv_data": scanning_data.get("steepv_analysis", {}),
-            "futures_triangle_data": scanning_data.get("futures_triangle", {})
-        }
-        
-        # Generate Futures Triangle 2.0
-        triangle_2_0 = self.processor.generate_futures_triangle_2_0(domain, phase1_data, phase2_data, document_text)
-        
-        # Generate Baseline Scenario
-        baseline_scenario = self.processor.generate_baseline_scenario(domain, triangle_2_0, phase1_data)
-        
-        # Generate Driver Outcomes
-        driver_outcomes = self.processor.generate_driver_outcomes(domain, triangle_2_0, baseline_scenario, phase1_data)
-        
-        # Generate Alternative Scenarios (1 of each type)
-        alternative_scenarios = self.processor.generate_alternative_scenarios(
-            domain, 
-            {"Collapse": 1, "New Equilibrium": 1, "Transformation": 1},
-            baseline_scenario,
-            driver_outcomes,
-            triangle_2_0
-        )
-        
+    def _assemble_futuring_results(self, stage_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Futuring phase results in the shape the views expect."""
+        scenarios = []
+        for key in SCENARIO_ARCHETYPES:
+            scenarios.extend(stage_results[f"scenario_{key}"].get("scenarios", []))
+
         return {
-            "futures_triangle_2_0": triangle_2_0,
-            "baseline_scenario": baseline_scenario,
-            "driver_outcomes": driver_outcomes,
-            "alternative_scenarios": alternative_scenarios,
+            "futures_triangle_2_0": stage_results["futures_triangle_2_0"],
+            "baseline_scenario": stage_results["baseline_scenario"],
+            "driver_outcomes": stage_results["driver_outcomes"],
+            "alternative_scenarios": {"scenarios": scenarios},
             "success": True
         }
 
-def create_stress_test_processor() -> PolicyStressTestProcessor:
-    """Factory function to create stress test processor."""
+def create_stress_test_processor(max_concurrency: int = 4) -> PolicyStressTestProcessor:
+    """Factory function to create stress test processor (checkpoints under STRESS_TEST_CHECKPOINT_DIR)."""
     from main import initialize_processor
     base_processor = initialize_processor()
-    return PolicyStressTestProcessor(base_processor)
\ No newline at end of file
+    checkpoint_store = CheckpointStore(os.getenv("STRESS_TEST_CHECKPOINT_DIR", "checkpoints"))
+    return PolicyStressTestProcessor(base_processor, max_concurrency=max_concurrency, checkpoint_store=checkpoint_store)
\ No newline at end of file
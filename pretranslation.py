@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+from llm_scheduler import BATCH, request_priority
+from metrics import PoolTracker
+from structured_logging import current_request_id, get_logger, reset_request_id, set_request_id
+from translation_service import TranslationManager
+
+log = get_logger("pretranslation")
+
+
+def valid_language_code(code: Any) -> bool:
+    return isinstance(code, str) and re.fullmatch(r"[a-z]{2}", code) is not None
+
+
+class ProjectLanguageSettings:
+    """Opt-in "preferred languages" per project, persisted as a small JSON file when path is set."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._languages: Dict[str, List[str]] = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._languages = json.load(f)
+            except (OSError, ValueError) as e:
+                log.error("Could not load project language settings", extra={"path": path, "error": str(e)})
+
+    def get(self, project: str) -> List[str]:
+        with self._lock:
+            return list(self._languages.get(project or "", []))
+
+    def set(self, project: str, languages: List[str]) -> List[str]:
+        """Replace a project's preferred languages; an empty list opts the project out."""
+        languages = list(dict.fromkeys(languages))
+        with self._lock:
+            if languages:
+                self._languages[project] = languages
+            else:
+                self._languages.pop(project, None)
+            if self.path:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(self._languages, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.path)
+        return languages
+
+
+class Pretranslator:
+    """Translates finished artifacts into their project's preferred languages in the background.
+
+    Results are kept next to the original under its artifact id, so switching language in the UI
+    is a lookup instead of a round of provider calls. Work runs at BATCH scheduler priority, so
+    interactive translations take the next free translation worker and are admitted first when
+    a provider's rate limit is tight.
+    """
+
+    def __init__(self, manager: TranslationManager, settings: ProjectLanguageSettings, source_lang: str = "en",
+                 max_workers: int = 2, max_entries: int = 500):
+        self.manager = manager
+        self.settings = settings
+        self.source_lang = source_lang
+        self.max_entries = max_entries
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pretranslate")
+        self._tracker = PoolTracker("pretranslation", max_workers)
+        self._tracker.__enter__()
+        self._results: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def artifact_id(artifact: str, output: Any) -> str:
+        digest = hashlib.sha256(json.dumps(output, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+        return f"{artifact}-{digest[:16]}"
+
+    def queue(self, project: str, artifact: str, output: Any) -> Optional[Dict[str, Any]]:
+        """Queue output for every preferred language of project; None when the project has not opted in."""
+        languages = [lang for lang in self.settings.get(project) if lang != self.source_lang]
+        if not languages:
+            return None
+        artifact_id = self.artifact_id(artifact, output)
+        for lang in languages:
+            with self._lock:
+                # The same output regenerated or re-sent is translated only once
+                if (artifact_id, lang) in self._results and self._results[(artifact_id, lang)]["status"] != "failed":
+                    continue
+                self._store(artifact_id, lang, {"status": "pending"})
+            self._tracker.submitted()
+            self._pool.submit(self._tracker.run, self._translate, artifact_id, artifact, output, lang,
+                              current_request_id())
+        return {"artifact_id": artifact_id, "languages": languages}
+
+    def _store(self, artifact_id: str, lang: str, entry: Dict[str, Any]):
+        # Caller holds self._lock
+        self._results[(artifact_id, lang)] = entry
+        self._results.move_to_end((artifact_id, lang))
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def _translate(self, artifact_id: str, artifact: str, output: Any, lang: str, request_id: str = None):
+        # Logged under the request that generated the artifact
+        token = set_request_id(request_id)
+        try:
+            with request_priority(BATCH):
+                document = self.manager.translate_document(output, self.source_lang, lang, strict=True,
+                                                           artifact=artifact)
+                vocabulary = self.manager.document_vocabulary(output, artifact)
+                labels = self.manager.vocabulary_labels(self.source_lang, lang, vocabulary) if vocabulary else {}
+            entry = {"status": "ready", "document": document, "labels": labels}
+        except Exception as e:
+            log.error("Background translation failed", extra={"artifact_id": artifact_id, "language": lang,
+                                                              "error": str(e)})
+            entry = {"status": "failed", "error": str(e)}
+        finally:
+            reset_request_id(token)
+        with self._lock:
+            self._store(artifact_id, lang, entry)
+
+    def get(self, artifact_id: str, lang: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._results.get((artifact_id, lang))
+            return dict(entry) if entry is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = [entry["status"] for entry in self._results.values()]
+        return {status: statuses.count(status) for status in ("pending", "ready", "failed")}
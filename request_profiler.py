@@ -0,0 +1,158 @@
+import hmac
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval from a background thread.
+
+    Stacks are kept in the collapsed format used by flamegraph.pl and speedscope
+    ("outer;inner;leaf count"), so a profile can be rendered directly as a flame graph.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="profile-sampler", daemon=True)
+        self.started = time.monotonic()
+        self.duration = 0.0
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> "StackSampler":
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.monotonic() - self.started
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+                self.samples += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfiler:
+    """Opt-in profiling of single requests, stored as collapsed-stack files for flame graphs.
+
+    A request is profiled only when it carries the X-Profile header or ?profile=1 and an
+    admin token matching admin_token (X-Admin-Token header). Without a configured token the
+    profiler is disabled. Requests without the flag pay for two dictionary lookups.
+    """
+
+    def __init__(self, directory: str = "profiles", admin_token: str = None, interval: float = 0.005,
+                 max_profiles: int = 50):
+        self.directory = directory
+        self.admin_token = admin_token
+        self.interval = interval
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.admin_token)
+
+    @staticmethod
+    def flagged(args, headers) -> bool:
+        """A ?profile query parameter (exactly that key) or an X-Profile header asks for a profile."""
+        return "profile" in args or "X-Profile" in headers
+
+    def is_admin(self, headers) -> bool:
+        token = headers.get("X-Admin-Token", "")
+        # Compare bytes: compare_digest rejects str with non-ASCII characters with a TypeError
+        return self.enabled and bool(token) and hmac.compare_digest(token.encode("utf-8"),
+                                                                    self.admin_token.encode("utf-8"))
+
+    def start(self) -> StackSampler:
+        return StackSampler(threading.get_ident(), self.interval).start()
+
+    def save(self, sampler: StackSampler, method: str, path: str, status: int) -> str:
+        """Stop the sampler and write its profile; returns the profile id."""
+        sampler.stop()
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        metadata = {
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_seconds": round(sampler.duration, 4),
+            "samples": sampler.samples,
+            "interval_seconds": self.interval,
+            "created_at": time.time()
+        }
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{profile_id}.folded"), "w", encoding="utf-8") as f:
+                f.write(sampler.collapsed())
+            with open(os.path.join(self.directory, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+                json.dump(metadata, f)
+            self._prune()
+        return profile_id
+
+    def _prune(self):
+        profiles = sorted(name[:-len(".json")] for name in os.listdir(self.directory) if name.endswith(".json"))
+        for profile_id in profiles[:max(0, len(profiles) - self.max_profiles)]:
+            for suffix in (".json", ".folded"):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + suffix))
+                except OSError:
+                    pass
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Stored profiles, newest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        profiles = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+                        profiles.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[str]:
+        """Location of a profile's collapsed-stack file, or None for unknown/malformed ids."""
+        if not re.fullmatch(r"[0-9]{8}-[0-9]{6}-[0-9a-f]{8}", profile_id or ""):
+            return None
+        path = os.path.join(self.directory, f"{profile_id}.folded")
+        return path if os.path.exists(path) else None
+
+
+_default_profiler: Optional[RequestProfiler] = None
+_default_profiler_lock = threading.Lock()
+
+
+def get_default_profiler() -> RequestProfiler:
+    """Process-wide profiler; PROFILING_ADMIN_TOKEN enables it, PROFILE_DIR / PROFILE_INTERVAL_MS tune it."""
+    global _default_profiler
+    with _default_profiler_lock:
+        if _default_profiler is None:
+            _default_profiler = RequestProfiler(
+                directory=os.getenv("PROFILE_DIR", "profiles"),
+                admin_token=os.getenv("PROFILING_ADMIN_TOKEN") or None,
+                interval=float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+            )
+        return _default_profiler
@@ -0,0 +1,184 @@
+import contextvars
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Any, Callable, Iterable, List, Tuple
+
+from metrics import PoolTracker, record_cache_lookup
+from structured_logging import get_logger
+
+log = get_logger("stage_graph")
+
+
+class StageGraphError(Exception):
+    """Raised when a stage fails; dependent stages are not started."""
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+def content_hash(value: Any) -> str:
+    """Stable hash of a JSON-serialisable value."""
+    canonical = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def stage_input_hash(fingerprint: str, stage: "Stage", output_hashes: Dict[str, str]) -> str:
+    """Hash identifying the inputs a stage is computed from: run fingerprint plus dependency outputs."""
+    return content_hash([fingerprint, stage.name, [(dep, output_hashes[dep]) for dep in sorted(stage.depends_on)]])
+
+
+class Stage:
+    """A unit of work in a pipeline.
+
+    fn is called with the results of its dependencies as keyword arguments named after the
+    dependency stages, e.g. Stage("steepv", lambda signals: ..., depends_on=["signals"]).
+    """
+
+    def __init__(self, name: str, fn: Callable[..., Any], depends_on: Iterable[str] = ()):
+        self.name = name
+        self.fn = fn
+        self.depends_on = list(depends_on)
+
+
+def topological_order(stages: List[Stage]) -> List[Stage]:
+    """Validate the graph and return its stages with every dependency before its dependents."""
+    by_name = {stage.name: stage for stage in stages}
+    if len(by_name) != len(stages):
+        raise ValueError("Stage names must be unique")
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in by_name]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    # Kahn's algorithm: every stage must be reachable without a cycle
+    order = []
+    remaining = {stage.name: set(stage.depends_on) for stage in stages}
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Stage graph has a cycle among: {sorted(remaining)}")
+        for name in ready:
+            del remaining[name]
+            order.append(by_name[name])
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return order
+
+
+def plan_from_checkpoints(stages: List[Stage], checkpoints, run_id: str, fingerprint: str = "") -> Dict[str, Dict[str, Any]]:
+    """Work out which stages a checkpointed run can reuse.
+
+    Returns, per stage in dependency order, {"stale": bool, "input_hash": str or None}. A stage
+    is stale when its checkpoint is missing or was computed from different inputs, and every
+    stage downstream of a stale one is stale too (its input hash is then unknown).
+    """
+    plan: Dict[str, Dict[str, Any]] = {}
+    output_hashes: Dict[str, str] = {}
+    for stage in topological_order(stages):
+        if any(plan[dep]["stale"] for dep in stage.depends_on):
+            plan[stage.name] = {"stale": True, "input_hash": None}
+            continue
+        input_hash = stage_input_hash(fingerprint, stage, output_hashes)
+        found, output = checkpoints.load(run_id, stage.name, input_hash)
+        if found:
+            output_hashes[stage.name] = content_hash(output)
+        plan[stage.name] = {"stale": not found, "input_hash": input_hash}
+    return plan
+
+
+class StageGraphExecutor:
+    """Run stages as soon as their inputs are ready, with at most max_concurrency at once."""
+
+    def __init__(self, max_concurrency: int = 4):
+        self.max_concurrency = max(1, max_concurrency)
+
+    def run(self, stages: List[Stage], checkpoints=None, run_id: str = None, fingerprint: str = "",
+            is_failed_output: Callable[[Any], bool] = None) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+        """Execute the graph. Returns (results by stage name, timings by stage name).
+
+        With a CheckpointStore and run_id, every completed stage output is saved under a hash of
+        the run fingerprint and its dependencies' outputs, and stages whose checkpoint matches
+        are restored instead of executed. Outputs flagged by is_failed_output are not saved, so
+        they run again on resume.
+        """
+        topological_order(stages)
+        origin = time.monotonic()
+        results: Dict[str, Any] = {}
+        output_hashes: Dict[str, str] = {}
+        timings: Dict[str, Dict[str, Any]] = {}
+        pending = {stage.name: stage for stage in stages}
+        running = {}
+        failure = None
+
+        def execute(stage: Stage, inputs: Dict[str, Any], stage_hash: str):
+            started = time.monotonic()
+            try:
+                output = stage.fn(**inputs)
+                if checkpoints is not None and not (is_failed_output and is_failed_output(output)):
+                    try:
+                        checkpoints.save(run_id, stage.name, stage_hash, output)
+                    except (OSError, TypeError, ValueError) as e:
+                        # A checkpoint that cannot be written must not fail the run itself
+                        log.error("Checkpoint save failed", extra={"run_id": run_id, "stage": stage.name,
+                                                                   "error": str(e)})
+                return output
+            finally:
+                timings[stage.name] = {
+                    "started_at": round(started - origin, 3),
+                    "duration": round(time.monotonic() - started, 3)
+                }
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="stage") as pool, \
+                PoolTracker("stage", self.max_concurrency) as tracker:
+            while pending or running:
+                if failure is None:
+                    ready = [stage for stage in pending.values() if all(dep in results for dep in stage.depends_on)]
+                    restored = False
+                    for stage in ready:
+                        del pending[stage.name]
+                        stage_hash = stage_input_hash(fingerprint, stage, output_hashes)
+                        if checkpoints is not None:
+                            found, output = checkpoints.load(run_id, stage.name, stage_hash)
+                            record_cache_lookup("stage_checkpoint", found)
+                            if found:
+                                results[stage.name] = output
+                                output_hashes[stage.name] = content_hash(output)
+                                timings[stage.name] = {"status": "restored"}
+                                restored = True
+                                continue
+                        inputs = {dep: results[dep] for dep in stage.depends_on}
+                        # Copy context so per-request settings (e.g. scheduler priority) reach the worker
+                        context = contextvars.copy_context()
+                        tracker.submitted()
+                        running[pool.submit(context.run, tracker.run, execute, stage, inputs, stage_hash)] = stage
+                    if restored:
+                        # Restored stages may have unblocked others; schedule them before waiting
+                        continue
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        results[stage.name] = future.result()
+                        output_hashes[stage.name] = content_hash(results[stage.name])
+                        timings[stage.name]["status"] = "completed"
+                    else:
+                        timings[stage.name]["status"] = "failed"
+                        if failure is None:
+                            failure = StageGraphError(stage.name, error)
+
+        for name in pending:
+            timings[name] = {"status": "skipped"}
+        timings["total"] = {"duration": round(time.monotonic() - origin, 3)}
+
+        if failure is not None:
+            failure.timings = timings
+            raise failure
+        return results, timings
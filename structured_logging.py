@@ -0,0 +1,175 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar, Token
+from typing import Dict, Any, Optional
+
+_request_id: ContextVar = ContextVar("log_request_id", default=None)
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def set_request_id(request_id: str) -> Token:
+    """Correlate every record logged in this context with request_id; undo with reset_request_id(token)."""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token: Token):
+    _request_id.reset(token)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+class ContextFilter(logging.Filter):
+    """Stamps records with the logging thread's request id before they cross the queue."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps the 1st, (every+1)th, ... record per sample_key; records without a key always pass.
+
+    Log high-volume messages with extra={"sample_key": "..."}; kept records carry the running
+    occurrence count so totals can still be read from the sampled output.
+    """
+
+    def __init__(self, every: int = 100):
+        super().__init__()
+        self.every = max(1, every)
+        self.suppressed = 0
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+        with self._lock:
+            count = self._counts[key] = self._counts.get(key, 0) + 1
+            if (count - 1) % self.every:
+                self.suppressed += 1
+                return False
+        record.occurrences = count
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread without ever blocking the caller.
+
+    Only the message interpolation happens on the calling thread; formatting and stream I/O
+    run on the listener. When the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+# Attributes every LogRecord has; anything else on a record came from extra= and is a field
+_RECORD_ATTRIBUTES = set(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {
+    "message", "asctime", "request_id", "sample_key", "taskName"
+}
+
+
+def _fields(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and any extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None)
+        }
+        entry.update(_fields(record))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Human-readable form of the same record: message followed by key=value fields."""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        fields = " ".join(f"{key}={value}" for key, value in _fields(record).items())
+        return f"{line} {fields}" if fields else line
+
+
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+_sampling_filter: Optional[SamplingFilter] = None
+_configure_lock = threading.Lock()
+
+
+def configure_logging() -> logging.Logger:
+    """Route the "foresight" logger through a background queue; safe to call repeatedly.
+
+    LOG_LEVEL (default INFO), LOG_FORMAT (json or text), LOG_SAMPLE_EVERY (default 100) and
+    LOG_QUEUE_SIZE (default 10000) tune it. Output goes to stderr from the listener thread.
+    """
+    global _queue_handler, _sampling_filter
+    logger = logging.getLogger("foresight")
+    with _configure_lock:
+        if _queue_handler is None:
+            log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", 10000)))
+            _sampling_filter = SamplingFilter(int(os.getenv("LOG_SAMPLE_EVERY", 100)))
+            _queue_handler = NonBlockingQueueHandler(log_queue)
+            _queue_handler.addFilter(_sampling_filter)
+            _queue_handler.addFilter(ContextFilter())
+
+            output = logging.StreamHandler(sys.stderr)
+            output.setFormatter(KeyValueFormatter() if os.getenv("LOG_FORMAT", "json") == "text" else JsonFormatter())
+            listener = logging.handlers.QueueListener(log_queue, output)
+            listener.start()
+            # Flush what is still queued when the process exits
+            atexit.register(listener.stop)
+
+            logger.addHandler(_queue_handler)
+            logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+            logger.propagate = False
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """A child of the "foresight" logger, e.g. get_logger("translation")."""
+    configure_logging()
+    return logging.getLogger(f"foresight.{name}")
+
+
+def logging_stats() -> Dict[str, int]:
+    return {"dropped": _queue_handler.dropped if _queue_handler else 0,
+            "sampled_out": _sampling_filter.suppressed if _sampling_filter else 0}
@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from llm_coalescing import SingleFlight
+
+
+def slow_call(calls, result="answer", error=None, delay=0.2):
+    def fn():
+        calls.append(1)
+        time.sleep(delay)
+        if error is not None:
+            raise error
+        return result
+    return fn
+
+
+def run_concurrently(single_flight, key, fn, callers=5):
+    outcomes = [None] * callers
+
+    def call(i):
+        try:
+            outcomes[i] = single_flight.do(key, fn)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+        # Let the leader claim the key before the followers arrive
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    return outcomes
+
+
+@pytest.fixture(params=["in_process", "sqlite"])
+def single_flight(request, tmp_path):
+    if request.param == "sqlite":
+        return SingleFlight(sqlite_path=str(tmp_path / "inflight.db"), poll_interval=0.01)
+    return SingleFlight()
+
+
+def test_concurrent_identical_keys_make_one_call(single_flight):
+    calls = []
+    assert run_concurrently(single_flight, "key", slow_call(calls)) == ["answer"] * 5
+    assert calls == [1]
+    assert single_flight.stats()["in_flight"] == 0
+
+
+def test_different_keys_are_not_coalesced():
+    single_flight, calls = SingleFlight(), []
+    run_concurrently(single_flight, "a", slow_call(calls), callers=1)
+    run_concurrently(single_flight, "b", slow_call(calls), callers=1)
+    assert len(calls) == 2
+
+
+def test_failure_reaches_every_waiter_and_is_not_cached(single_flight):
+    calls = []
+    outcomes = run_concurrently(single_flight, "key", slow_call(calls, error=ValueError("provider down")))
+    assert calls == [1]
+    assert all(isinstance(outcome, Exception) and "provider down" in str(outcome) for outcome in outcomes)
+
+    # The next call after the failure goes to the provider again
+    assert single_flight.do("key", slow_call(calls, delay=0)) == "answer"
+    assert len(calls) == 2
+
+
+def test_cross_worker_followers_reuse_the_leaders_result(tmp_path):
+    path = str(tmp_path / "inflight.db")
+    leader, follower = SingleFlight(sqlite_path=path, poll_interval=0.01), SingleFlight(sqlite_path=path,
+                                                                                        poll_interval=0.01)
+    calls, results = [], []
+    thread = threading.Thread(target=lambda: results.append(leader.do("key", slow_call(calls))))
+    thread.start()
+    time.sleep(0.05)
+    results.append(follower.do("key", slow_call(calls)))
+    thread.join()
+    assert results == ["answer", "answer"]
+    assert calls == [1]
+    assert follower.stats()["cross_worker_coalesced"] == 1
@@ -0,0 +1,104 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from llm_coalescing import SingleFlight
+from llm_hedging import HedgingPolicy
+from llm_ledger import LLMLedger
+from llm_resilience import CircuitBreaker, ResilientCaller
+from llm_scheduler import RateLimitScheduler
+from main import DRIForesightProcessor
+
+
+def attempts(*delays):
+    """fn for HedgingPolicy.call whose n-th attempt takes delays[n]; records each attempt's cancel event."""
+    events = []
+    lock = threading.Lock()
+
+    def fn(cancel_event):
+        with lock:
+            index = len(events)
+            events.append(cancel_event)
+        time.sleep(delays[index])
+        return f"attempt {index}"
+
+    return fn, events
+
+
+def test_fast_calls_are_not_hedged():
+    policy = HedgingPolicy(default_deadline=0.2)
+    fn, events = attempts(0.01)
+    assert policy.call("op", fn) == "attempt 0"
+    assert len(events) == 1
+    assert policy.stats()["hedges_fired"] == 0
+
+
+def test_no_hedge_before_enough_latency_samples():
+    policy = HedgingPolicy(min_samples=20)
+    fn, events = attempts(0.05)
+    assert policy.call("op", fn) == "attempt 0"
+    assert len(events) == 1
+
+
+def test_hedge_fires_after_the_deadline_and_the_loser_is_cancelled():
+    policy = HedgingPolicy(default_deadline=0.05)
+    fn, events = attempts(0.5, 0.01)
+    started = time.monotonic()
+    assert policy.call("op", fn) == "attempt 1"
+    assert time.monotonic() - started < 0.3
+    primary_cancel, hedge_cancel = events
+    assert primary_cancel.is_set() and not hedge_cancel.is_set()
+    assert policy.stats() == {"calls": 1, "hedges_fired": 1, "hedge_wins": 1, "hedge_win_rate": 1.0}
+
+
+def test_primary_winning_after_the_hedge_fired_cancels_the_hedge():
+    policy = HedgingPolicy(default_deadline=0.05)
+    fn, events = attempts(0.1, 0.5)
+    assert policy.call("op", fn) == "attempt 0"
+    assert events[1].is_set()
+    assert policy.stats()["hedge_wins"] == 0
+
+
+def fake_groq(*delays):
+    calls = []
+
+    def create(**request_kwargs):
+        index = len(calls)
+        calls.append(request_kwargs)
+        time.sleep(delays[index])
+        completion = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer {index}"))],
+                                     usage=None)
+        return SimpleNamespace(parse=lambda: completion, headers={})
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+        with_raw_response=SimpleNamespace(create=create))))
+    return client, calls
+
+
+def hedged_processor(scheduler: RateLimitScheduler) -> DRIForesightProcessor:
+    return DRIForesightProcessor("test-key", scheduler=scheduler,
+                                 resilience=ResilientCaller(circuit_breaker=CircuitBreaker()),
+                                 hedging=HedgingPolicy(default_deadline=0.05), single_flight=SingleFlight(),
+                                 ledger=LLMLedger())
+
+
+def test_both_hedged_attempts_are_admitted_by_the_scheduler():
+    scheduler = RateLimitScheduler(requests_per_minute=1000, tokens_per_minute=10000000)
+    processor = hedged_processor(scheduler)
+    processor.client, calls = fake_groq(0.5, 0.01)
+    assert processor._chat_completion([{"role": "user", "content": "hi"}], 10, 0.1) == "answer 1"
+    assert len(calls) == 2
+    assert scheduler.stats()["admitted_interactive"] == 2
+
+
+def test_hedge_still_queued_in_the_scheduler_is_never_sent():
+    scheduler = RateLimitScheduler(requests_per_minute=60, tokens_per_minute=10000000)
+    for _ in range(59):
+        scheduler.acquire(1)
+    processor = hedged_processor(scheduler)
+    processor.client, calls = fake_groq(0.15)
+    # The hedge fires at 0.05s but waits ~1s for rate-limit capacity; the primary answers first
+    assert processor._chat_completion([{"role": "user", "content": "hi"}], 10, 0.1) == "answer 0"
+    time.sleep(1.2)
+    assert len(calls) == 1
+    assert processor.hedging.stats()["hedges_fired"] == 1
@@ -0,0 +1,100 @@
+import httpx
+import pytest
+from groq import APIStatusError
+
+from llm_resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, failed_generation
+
+
+def status_error(status_code: int, body: dict = None) -> APIStatusError:
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(status_code, request=request)
+    return APIStatusError(f"Error code: {status_code}", response=response, body=body)
+
+
+def open_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    return breaker
+
+
+def raise_error(exc: Exception):
+    def fn():
+        raise exc
+    return fn
+
+
+def test_breaker_opens_after_threshold_transient_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+    caller = ResilientCaller(max_attempts=1, circuit_breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(APIStatusError):
+            caller.call("op", raise_error(status_error(503)))
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        caller.call("op", lambda: "ok")
+    assert caller.stats()["operations"]["op"]["circuit_rejections"] == 1
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = open_breaker()
+    assert breaker.state == "half_open"
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_half_open_probe_failing_with_400_closes_the_circuit():
+    breaker = open_breaker()
+    caller = ResilientCaller(max_attempts=3, circuit_breaker=breaker)
+    with pytest.raises(APIStatusError):
+        caller.call("op", raise_error(status_error(400)))
+    # The provider answered, so the trial is released and the circuit closes
+    assert breaker.state == "closed"
+    assert caller.call("op", lambda: "ok") == "ok"
+
+
+def test_half_open_probe_failing_transiently_reopens_the_circuit():
+    breaker = open_breaker()
+    breaker.reset_timeout = 60.0
+    breaker._opened_at -= 60.0
+    caller = ResilientCaller(max_attempts=1, circuit_breaker=breaker)
+    with pytest.raises(APIStatusError):
+        caller.call("op", raise_error(status_error(500)))
+    assert breaker.state == "open"
+
+
+def test_non_retryable_errors_are_not_retried():
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise status_error(400)
+
+    caller = ResilientCaller(max_attempts=4, circuit_breaker=CircuitBreaker())
+    with pytest.raises(APIStatusError):
+        caller.call("op", fn)
+    assert len(calls) == 1
+    assert caller.stats()["operations"]["op"]["retries"] == 0
+
+
+def test_retries_record_wait_time():
+    outcomes = [status_error(429), status_error(502)]
+
+    def fn():
+        if outcomes:
+            raise outcomes.pop(0)
+        return "ok"
+
+    caller = ResilientCaller(max_attempts=3, initial_wait=0.001, max_wait=0.01, circuit_breaker=CircuitBreaker())
+    assert caller.call("op", fn) == "ok"
+    stats = caller.stats()["operations"]["op"]
+    assert stats["attempts"] == 3
+    assert stats["retries"] == 2
+    assert stats["retry_wait_seconds"] > 0
+
+
+def test_failed_generation_is_read_from_json_validate_failed_errors():
+    body = {"error": {"code": "json_validate_failed", "failed_generation": '{"a": 1,}'}}
+    assert failed_generation(status_error(400, body)) == '{"a": 1,}'
+    assert failed_generation(status_error(400, {"error": {"code": "context_length_exceeded"}})) is None
+    assert failed_generation(status_error(500, body)) is None
+    assert failed_generation(ValueError("not a provider error")) is None
@@ -0,0 +1,85 @@
+import threading
+import time
+
+from llm_scheduler import BATCH, INTERACTIVE, RateLimitScheduler, parse_reset_duration, request_priority
+
+
+def drained(requests_per_minute=600, tokens_per_minute=1000000) -> RateLimitScheduler:
+    scheduler = RateLimitScheduler(requests_per_minute, tokens_per_minute)
+    for _ in range(requests_per_minute):
+        scheduler.acquire(1)
+    return scheduler
+
+
+def test_parse_reset_duration():
+    assert parse_reset_duration("7.66s") == 7.66
+    assert abs(parse_reset_duration("2m59.56s") - 179.56) < 1e-9
+    assert parse_reset_duration("1h2m") == 3720
+    assert parse_reset_duration("250ms") == 0.25
+    assert parse_reset_duration("3") == 3
+    assert parse_reset_duration(None) == 0.0
+
+
+def test_requests_wait_for_the_bucket_to_refill():
+    scheduler = drained(requests_per_minute=600)
+    waited = scheduler.acquire(1)
+    # 600 per minute refills one request every 0.1s
+    assert 0.05 < waited < 0.5
+    assert scheduler.stats()["queue_wait_seconds"] >= waited - 0.01
+
+
+def test_token_budget_is_enforced_separately():
+    scheduler = RateLimitScheduler(requests_per_minute=100000, tokens_per_minute=6000)
+    assert scheduler.acquire(6000) < 0.05
+    # 6000 tokens per minute refill 100 tokens per second
+    assert 0.1 < scheduler.acquire(20) < 0.6
+
+
+def test_buckets_are_clamped_to_ratelimit_headers():
+    scheduler = RateLimitScheduler(requests_per_minute=30, tokens_per_minute=30000)
+    scheduler.update_from_headers({
+        "x-ratelimit-limit-tokens": "12000",
+        "x-ratelimit-remaining-tokens": "500",
+        "x-ratelimit-remaining-requests": "2"
+    })
+    stats = scheduler.stats()
+    assert stats["tokens_per_minute"] == 12000
+    assert stats["available_tokens"] < 510
+    assert stats["available_requests"] < 2.1
+
+
+def test_exhausted_quota_pauses_until_reset():
+    scheduler = RateLimitScheduler(requests_per_minute=100000, tokens_per_minute=100000000)
+    scheduler.update_from_headers({"x-ratelimit-remaining-requests": "0", "x-ratelimit-reset-requests": "200ms"})
+    assert 0.15 < scheduler.acquire(1) < 0.6
+
+
+def test_retry_after_pauses_admissions():
+    scheduler = RateLimitScheduler(requests_per_minute=100000, tokens_per_minute=100000000)
+    scheduler.on_rate_limited({"retry-after": "0.3"})
+    assert scheduler.acquire(1) >= 0.25
+    assert scheduler.stats()["rate_limited_responses"] == 1
+
+
+def test_interactive_requests_overtake_queued_batch_requests():
+    scheduler = drained(requests_per_minute=600)
+    admitted = []
+
+    def call(name, priority):
+        with request_priority(priority):
+            scheduler.acquire(1)
+        admitted.append(name)
+
+    threads = [threading.Thread(target=call, args=(f"batch {i}", BATCH)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.02)
+    threads.append(threading.Thread(target=call, args=("interactive", INTERACTIVE)))
+    threads[-1].start()
+    for thread in threads:
+        thread.join()
+    # Only a batch request already at the head of the queue can be admitted first
+    assert admitted.index("interactive") <= 1
+    stats = scheduler.stats()
+    assert stats["admitted_batch"] == 3
+    assert stats["admitted_interactive"] == 601
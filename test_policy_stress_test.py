@@ -0,0 +1,105 @@
+from checkpoint_store import CheckpointStore
+from policy_stress_test import PolicyStressTestProcessor
+
+
+class FakeProcessor:
+    """Answers every generation call with a small dict and counts the calls per method."""
+
+    def __init__(self):
+        self.calls = {}
+
+    def _answer(self, name, **fields):
+        self.calls[name] = self.calls.get(name, 0) + 1
+        return dict(fields, generated_by=name)
+
+    def generate_domain_map(self, domain, document_text, project_name):
+        return self._answer("domain_map", central_domain=domain, description=document_text[:20], sub_domains=[])
+
+    def generate_signals(self, domain, document_text):
+        return self._answer("signals", strong_signals=[{"title": document_text[:20]}], weak_signals=[])
+
+    def generate_steepv_analysis(self, domain, signals, document_text):
+        return self._answer("steepv")
+
+    def generate_futures_triangle(self, domain, signals, steepv, document_text):
+        return self._answer("futures_triangle")
+
+    def generate_futures_triangle_2_0(self, domain, phase1_data, phase2_data, document_text):
+        return self._answer("futures_triangle_2_0")
+
+    def generate_baseline_scenario(self, domain, futures_triangle_2_0, phase1_data):
+        return self._answer("baseline_scenario")
+
+    def generate_driver_outcomes(self, domain, futures_triangle_2_0, baseline_scenario, phase1_data):
+        return self._answer("driver_outcomes")
+
+    def generate_alternative_scenarios(self, domain, counts, baseline_scenario, driver_outcomes, futures_triangle_2_0):
+        self._answer("alternative_scenarios")
+        return {"scenarios": [{"archetype": archetype} for archetype in counts]}
+
+
+def make_stress_tester(tmp_path):
+    processor = FakeProcessor()
+    store = CheckpointStore(str(tmp_path / "checkpoints"))
+    return processor, PolicyStressTestProcessor(processor, max_concurrency=2, checkpoint_store=store)
+
+
+def test_completed_run_has_no_stale_stages_and_resume_restores_everything(tmp_path):
+    processor, stress_tester = make_stress_tester(tmp_path)
+    results = stress_tester.run_comprehensive_analysis("Sport", "Project", "Document A", run_id="run1")
+    assert results["processing_status"] == "completed"
+    assert stress_tester.stale_stages("run1") == []
+
+    calls_before = dict(processor.calls)
+    resumed = stress_tester.resume_comprehensive_analysis("run1")
+    assert resumed["processing_status"] == "completed"
+    assert processor.calls == calls_before
+    assert all(timing.get("status") == "restored" for name, timing in resumed["stage_timings"].items()
+               if name != "total")
+
+
+def test_rerunning_a_run_id_with_new_inputs_replaces_the_manifest(tmp_path):
+    processor, stress_tester = make_stress_tester(tmp_path)
+    stress_tester.run_comprehensive_analysis("Sport", "Project", "Document A", run_id="run1")
+    stress_tester.run_comprehensive_analysis("Sport", "Project", "Document B", run_id="run1")
+
+    assert stress_tester.checkpoint_store.load_manifest("run1")["document_text"] == "Document B"
+    assert stress_tester.stale_stages("run1") == []
+    resumed = stress_tester.resume_comprehensive_analysis("run1")
+    assert resumed["scanning_results"]["signals"]["strong_signals"] == [{"title": "Document B"}]
+
+
+def test_editing_a_stage_invalidates_only_downstream_stages(tmp_path):
+    processor, stress_tester = make_stress_tester(tmp_path)
+    stress_tester.run_comprehensive_analysis("Sport", "Project", "Document A", run_id="run1")
+
+    stale = stress_tester.update_stage_output("run1", "baseline_scenario", {"scenario_title": "Edited"})
+    assert stale == ["driver_outcomes", "scenario_collapse", "scenario_new_equilibrium", "scenario_transformation"]
+
+    calls_before = dict(processor.calls)
+    resumed = stress_tester.resume_comprehensive_analysis("run1")
+    assert resumed["futuring_results"]["baseline_scenario"] == {"scenario_title": "Edited"}
+    assert processor.calls["driver_outcomes"] == calls_before["driver_outcomes"] + 1
+    assert processor.calls["alternative_scenarios"] == calls_before["alternative_scenarios"] + 3
+    assert processor.calls["signals"] == calls_before["signals"]
+
+
+def test_fallback_outputs_are_not_checkpointed_and_retried_on_resume(tmp_path):
+    processor, stress_tester = make_stress_tester(tmp_path)
+    generate_steepv = processor.generate_steepv_analysis
+    processor.generate_steepv_analysis = lambda *args: {"fallback": True, "Social": ["placeholder"]}
+    generate_scenarios = processor.generate_alternative_scenarios
+    processor.generate_alternative_scenarios = lambda domain, counts, *args: {
+        "scenarios": [{"archetype": archetype, "fallback": True} for archetype in counts]}
+
+    results = stress_tester.run_comprehensive_analysis("Sport", "Project", "Document A", run_id="run1")
+    assert results["processing_status"] == "completed"
+    stale = stress_tester.stale_stages("run1")
+    assert "steepv" in stale
+    assert {"scenario_collapse", "scenario_new_equilibrium", "scenario_transformation"} <= set(stale)
+
+    processor.generate_steepv_analysis = generate_steepv
+    processor.generate_alternative_scenarios = generate_scenarios
+    resumed = stress_tester.resume_comprehensive_analysis("run1")
+    assert resumed["scanning_results"]["steepv_analysis"]["generated_by"] == "steepv"
+    assert stress_tester.stale_stages("run1") == []
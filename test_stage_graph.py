@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+from checkpoint_store import CheckpointStore
+from stage_graph import Stage, StageGraphError, StageGraphExecutor, plan_from_checkpoints, topological_order
+
+
+def diamond(calls):
+    def stage(name, value):
+        def fn(**inputs):
+            calls.append(name)
+            return value(**inputs)
+        return fn
+
+    return [
+        Stage("a", stage("a", lambda: 1)),
+        Stage("b", stage("b", lambda a: a + 1), depends_on=["a"]),
+        Stage("c", stage("c", lambda a: a * 10), depends_on=["a"]),
+        Stage("d", stage("d", lambda b, c: b + c), depends_on=["b", "c"])
+    ]
+
+
+def test_topological_order_rejects_cycles_and_unknown_dependencies():
+    with pytest.raises(ValueError):
+        topological_order([Stage("a", lambda b: b, depends_on=["b"]), Stage("b", lambda a: a, depends_on=["a"])])
+    with pytest.raises(ValueError):
+        topological_order([Stage("a", lambda missing: missing, depends_on=["missing"])])
+
+
+def test_stages_receive_their_dependencies_outputs():
+    calls = []
+    results, timings = StageGraphExecutor(2).run(diamond(calls))
+    assert results == {"a": 1, "b": 2, "c": 10, "d": 12}
+    assert calls[0] == "a" and calls[-1] == "d"
+    assert timings["d"]["status"] == "completed"
+
+
+def test_failure_skips_dependents():
+    def fail(a):
+        raise RuntimeError("boom")
+
+    stages = [Stage("a", lambda: 1), Stage("b", fail, depends_on=["a"]), Stage("c", lambda b: b, depends_on=["b"])]
+    with pytest.raises(StageGraphError) as info:
+        StageGraphExecutor(2).run(stages)
+    assert info.value.stage == "b"
+    assert info.value.timings["c"] == {"status": "skipped"}
+
+
+def test_checkpoints_are_restored_for_the_same_fingerprint_only(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    calls = []
+    StageGraphExecutor(2).run(diamond(calls), checkpoints=store, run_id="run", fingerprint="inputs-1")
+    assert sorted(calls) == ["a", "b", "c", "d"]
+
+    calls.clear()
+    results, timings = StageGraphExecutor(2).run(diamond(calls), checkpoints=store, run_id="run",
+                                                 fingerprint="inputs-1")
+    assert calls == []
+    assert results["d"] == 12
+    assert timings["a"] == {"status": "restored"}
+
+    StageGraphExecutor(2).run(diamond(calls), checkpoints=store, run_id="run", fingerprint="inputs-2")
+    assert sorted(calls) == ["a", "b", "c", "d"]
+
+
+def test_edited_checkpoint_makes_only_downstream_stages_stale(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    StageGraphExecutor(2).run(diamond([]), checkpoints=store, run_id="run", fingerprint="f")
+    plan = plan_from_checkpoints(diamond([]), store, "run", "f")
+    assert not any(entry["stale"] for entry in plan.values())
+
+    store.save("run", "b", plan["b"]["input_hash"], 5)
+    plan = plan_from_checkpoints(diamond([]), store, "run", "f")
+    assert [name for name, entry in plan.items() if entry["stale"]] == ["d"]
+
+
+def test_failed_outputs_are_not_checkpointed(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    stages = [Stage("a", lambda: {"error": "rate limited"})]
+    StageGraphExecutor().run(stages, checkpoints=store, run_id="run", is_failed_output=lambda output: "error" in output)
+    assert store.completed_stages("run") == []
+
+
+def test_concurrent_saves_of_the_same_checkpoint_do_not_collide(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    errors = []
+
+    def save(value):
+        try:
+            for _ in range(50):
+                store.save("run", "stage", "hash", {"value": value})
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    found, output = store.load("run", "stage", "hash")
+    assert found and output["value"] in range(8)
@@ -0,0 +1,40 @@
+from translation_cache import TranslationCache
+
+
+def test_lookups_normalize_language_codes_and_whitespace():
+    cache = TranslationCache()
+    cache.put("EN", "lo", "Clubs  open.", "translated")
+    assert cache.get("en", "LO", "Clubs open.") == "translated"
+    assert cache.get("en", "th", "Clubs open.") is None
+
+
+def test_memory_lru_evicts_the_least_recently_used_entry():
+    cache = TranslationCache(max_entries=2)
+    cache.put("en", "lo", "one", "1")
+    cache.put("en", "lo", "two", "2")
+    assert cache.get("en", "lo", "one") == "1"
+    cache.put("en", "lo", "three", "3")
+    assert cache.get("en", "lo", "two") is None
+    assert cache.get("en", "lo", "one") == "1"
+    assert cache.get("en", "lo", "three") == "3"
+    assert cache.stats()["memory_entries"] == 2
+
+
+def test_sqlite_entries_persist_across_instances(tmp_path):
+    path = str(tmp_path / "translations.db")
+    TranslationCache(sqlite_path=path).put("en", "lo", "Clubs open.", "translated")
+
+    other = TranslationCache(sqlite_path=path)
+    assert other.get("en", "lo", "Clubs open.") == "translated"
+    # Served from memory after the first SQLite read
+    assert other.get("en", "lo", "Clubs open.") == "translated"
+    stats = other.stats()
+    assert stats["sqlite_hits"] == 1 and stats["memory_hits"] == 1
+
+
+def test_entries_evicted_from_memory_are_still_read_from_sqlite(tmp_path):
+    cache = TranslationCache(sqlite_path=str(tmp_path / "translations.db"), max_entries=1)
+    cache.put("en", "lo", "one", "1")
+    cache.put("en", "lo", "two", "2")
+    assert cache.get("en", "lo", "one") == "1"
+    assert cache.stats()["sqlite_hits"] == 1
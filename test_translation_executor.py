@@ -0,0 +1,58 @@
+import time
+
+import pytest
+
+from llm_scheduler import BATCH, INTERACTIVE, RateLimitScheduler, request_priority
+from translation_executor import TranslationExecutor
+
+
+def recording_fn(finished, latency=0.02):
+    def fn(batch):
+        time.sleep(latency)
+        finished.append(batch[0])
+        return batch
+    return fn
+
+
+def test_interactive_group_overtakes_queued_batch_group():
+    executor = TranslationExecutor(max_workers=1)
+    limiter = RateLimitScheduler(requests_per_minute=100000, tokens_per_minute=100000000)
+    finished = []
+    with request_priority(BATCH):
+        background = executor.submit_group(limiter, recording_fn(finished), [[f"batch {i}"] for i in range(5)])
+    with request_priority(INTERACTIVE):
+        interactive = executor.submit_group(limiter, recording_fn(finished), [["interactive"]])
+
+    assert interactive.results(timeout=5) == [["interactive"]]
+    background.results(timeout=5)
+    # At most the batch job already running when the interactive one arrived finishes first
+    assert finished.index("interactive") <= 1
+    assert finished[-1] == "batch 4"
+
+
+def unlimited():
+    return RateLimitScheduler(requests_per_minute=100000, tokens_per_minute=100000000)
+
+
+def test_any_provider_exception_is_returned_with_return_exceptions():
+    def fn(batch):
+        if batch == ["bad"]:
+            raise KeyError("result-container")
+        return batch
+
+    group = TranslationExecutor(max_workers=2).submit_group(unlimited(), fn, [["ok"], ["bad"]])
+    ok, error = group.results(timeout=5, return_exceptions=True)
+    assert ok == ["ok"]
+    assert isinstance(error, KeyError)
+    with pytest.raises(KeyError):
+        group.results(timeout=5)
+
+
+def test_timeout_bounds_the_whole_group():
+    group = TranslationExecutor(max_workers=1).submit_group(unlimited(), recording_fn([], latency=0.2),
+                                                            [[str(i)] for i in range(4)])
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        group.results(timeout=0.3)
+    assert time.monotonic() - started < 0.5
+    assert group.cancelled
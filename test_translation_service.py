@@ -0,0 +1,132 @@
+from translation_cache import TranslationCache
+from translation_executor import TranslationExecutor
+from translation_schemas import FIXED_VOCABULARY
+from translation_service import TranslationManager, chunk_text, split_segments
+
+SCENARIO = {
+    "scenario_title": "Community sport grows",
+    "archetype": "Transformation",
+    "scenario_text": "Clubs open new facilities.",
+    "probability_assessment": "Medium - funding is uncertain",
+    "timeframe": "2025-2030"
+}
+
+
+def offline_manager(**options) -> TranslationManager:
+    # Offline provider: pseudo-translates by accenting vowels, e.g. "sport" -> "spört"
+    return TranslationManager("offline", cache=TranslationCache(), executor=TranslationExecutor(max_workers=2),
+                              latency=0.0, **options)
+
+
+def test_schema_translates_prose_and_keeps_vocabulary():
+    manager = offline_manager()
+    translated = manager.translate_document(SCENARIO, "en", "lo", artifact="scenario")
+    assert translated["scenario_title"] == "Cömmûnîtÿ spört gröws"
+    assert translated["archetype"] == "Transformation"
+    assert translated["timeframe"] == "2025-2030"
+    # Free-text justification, not a fixed value
+    assert translated["probability_assessment"] == "Médîûm - fûndîng îs ûncértàîn"
+    assert manager.document_vocabulary(SCENARIO, "scenario") == ["Transformation"]
+
+
+def test_vocabulary_labels_come_from_the_shared_table():
+    manager = offline_manager()
+    labels = manager.vocabulary_labels("en", "lo", ["Transformation"])
+    assert labels == {"Transformation": "Trànsförmàtîön"}
+    requests = manager.service.stats()["requests"]
+    assert manager.vocabulary_labels("en", "lo", ["High", "Transformation"])["High"] == "Hîgh"
+    assert manager.service.stats()["requests"] == requests
+
+
+def test_vocabulary_table_is_bounded_but_keeps_fixed_vocabulary():
+    manager = offline_manager(max_vocabulary_labels=len(FIXED_VOCABULARY) + 2)
+    for i in range(10):
+        assert manager.vocabulary_labels("en", "lo", [f"value {i}"]) == {f"value {i}": f"vàlûé {i}"}
+    table = manager._vocabulary_labels[("en", "lo")]
+    assert len(table) == len(FIXED_VOCABULARY) + 2
+    assert set(FIXED_VOCABULARY) <= set(table)
+    assert "value 9" in table and "value 0" not in table
+
+
+def test_schema_less_translation_skips_ids_timeframes_and_vocabulary():
+    manager = offline_manager()
+    document = {"drivers": [{"id": "D1", "name": "Funding", "category": "Economic", "impact_level": "High"}],
+                "alternative_scenarios": {"scenarios": [SCENARIO]},
+                "note": {"category": "a custom category"}}
+    translated = manager.translate_to_lao(document)
+    assert translated["drivers"] == [{"id": "D1", "name": "Fûndîng", "category": "Economic", "impact_level": "High"}]
+    scenario = translated["alternative_scenarios"]["scenarios"][0]
+    assert scenario["archetype"] == "Transformation"
+    assert scenario["timeframe"] == "2025-2030"
+    assert scenario["scenario_text"] == "Clûbs öpén néw fàcîlîtîés."
+    # Not a fixed value, so still translated
+    assert translated["note"]["category"] == "à cûstöm càtégörÿ"
+
+
+def test_unexpected_provider_errors_leave_texts_untranslated_and_uncached():
+    manager = offline_manager()
+
+    def broken(texts, source_lang, target_lang):
+        raise KeyError("result-container")
+
+    manager.service.translate_batch = broken
+    assert manager.translate_batch(["Clubs open.", "Funding falls."], "en", "lo") == ["Clubs open.", "Funding falls."]
+    assert manager.cache.get("en", "lo", "Clubs open.") is None
+
+
+def test_failed_vocabulary_translation_is_not_stored_as_a_label():
+    manager = offline_manager()
+    translate_batch = manager.service.translate_batch
+
+    def broken(texts, source_lang, target_lang):
+        raise KeyError("result-container")
+
+    manager.service.translate_batch = broken
+    assert manager.vocabulary_labels("en", "lo", ["High"]) == {"High": "High"}
+    assert manager._vocabulary_labels[("en", "lo")] == {}
+
+    manager.service.translate_batch = translate_batch
+    assert manager.vocabulary_labels("en", "lo", ["High"]) == {"High": "Hîgh"}
+
+
+def test_editing_one_sentence_retranslates_only_that_sentence():
+    manager = offline_manager()
+    text = "Clubs open. Funding falls.\n\nVolunteers leave. Fees rise."
+    assert "".join(segment + separator for segment, separator in split_segments(text)) == text
+    manager.translate_batch([text], "en", "lo")
+    texts = manager.service.stats()["texts"]
+
+    stats = {}
+    edited = text.replace("Volunteers leave.", "Volunteers return.")
+    translated = manager.translate_batch([edited], "en", "lo", stats=stats)
+    assert translated == ["Clûbs öpén. Fûndîng fàlls.\n\nVölûntéérs rétûrn. Féés rîsé."]
+    assert stats == {"segments": 4, "cached_segments": 3}
+    assert manager.service.stats()["texts"] == texts + 1
+
+
+def assert_round_trips(text, limit):
+    chunks = chunk_text(text, limit)
+    assert "".join(chunk + separator for chunk, separator in chunks) == text
+    assert all(len(chunk) <= limit for chunk, _ in chunks)
+    return chunks
+
+
+def test_chunk_text_round_trips_over_the_limit():
+    chunks = assert_round_trips("Clubs open new facilities. Funding falls.\n\nVolunteers leave. Fees rise.", 30)
+    # Paragraph breaks stay between chunks, never inside one
+    assert all("\n" not in chunk for chunk, _ in chunks)
+    assert ("Funding falls.", "\n\n") in chunks
+
+
+def test_chunk_text_without_sentence_boundaries_falls_back_to_words_then_a_hard_cut():
+    words = " ".join(["funding"] * 30)
+    chunks = assert_round_trips(words, 40)
+    assert len(chunks) > 1 and all(chunk.strip() == chunk for chunk, _ in chunks)
+    assert [chunk for chunk, _ in assert_round_trips("x" * 95, 40)] == ["x" * 40, "x" * 40, "x" * 15]
+
+
+def test_texts_over_the_provider_limit_are_chunked_and_reassembled():
+    manager = offline_manager(max_chars=40, segment_sentences=False)
+    text = " ".join(["funding"] * 30) + "\n\n" + "sport"
+    translated = manager.translate_batch([text], "en", "lo", strict=True)
+    assert translated == [" ".join(["fûndîng"] * 30) + "\n\n" + "spört"]
@@ -0,0 +1,132 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import closing
+from typing import Dict, Any, Optional, Tuple
+
+from metrics import record_cache_lookup
+from structured_logging import get_logger
+
+log = get_logger("translation_cache")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFC, trimmed, runs of spaces/tabs collapsed.
+
+    Newlines are kept, since paragraph breaks change how a text is translated.
+    """
+    return re.sub(r"[ \t]+", " ", unicodedata.normalize("NFC", text)).strip()
+
+
+def translation_key(source_lang: str, target_lang: str, text: str) -> Tuple[str, str, str]:
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return source_lang.lower(), target_lang.lower(), digest
+
+
+class TranslationCache:
+    """Translation memory keyed on (source_lang, target_lang, normalized text hash).
+
+    An in-memory LRU sits in front of an optional SQLite file; the file is shared by every
+    worker process, so a text translated once by any worker is a local read for all of them.
+    """
+
+    def __init__(self, sqlite_path: str = None, max_entries: int = 10000):
+        self.sqlite_path = sqlite_path
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[Tuple[str, str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "sqlite_hits": 0, "misses": 0, "writes": 0}
+        if sqlite_path:
+            with closing(self._connect()) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS translations ("
+                    "source_lang TEXT, target_lang TEXT, text_hash TEXT, translation TEXT, created REAL, "
+                    "PRIMARY KEY (source_lang, target_lang, text_hash))"
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.sqlite_path, timeout=30, isolation_level=None)
+
+    def _remember(self, key: Tuple[str, str, str], translation: str):
+        # Caller holds self._lock
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        key = translation_key(source_lang, target_lang, text)
+        with self._lock:
+            translation = self._memory.get(key)
+            if translation is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+        if translation is None and self.sqlite_path:
+            try:
+                with closing(self._connect()) as conn:
+                    row = conn.execute(
+                        "SELECT translation FROM translations WHERE source_lang = ? AND target_lang = ? AND text_hash = ?",
+                        key
+                    ).fetchone()
+            except sqlite3.Error as e:
+                log.warning("Translation cache read failed",
+                            extra={"error": str(e), "sample_key": "cache_read_failed"})
+                row = None
+            if row is not None:
+                translation = row[0]
+                with self._lock:
+                    self._remember(key, translation)
+                    self._stats["sqlite_hits"] += 1
+        if translation is None:
+            with self._lock:
+                self._stats["misses"] += 1
+        record_cache_lookup("translation", translation is not None)
+        return translation
+
+    def put(self, source_lang: str, target_lang: str, text: str, translation: str):
+        key = translation_key(source_lang, target_lang, text)
+        with self._lock:
+            self._remember(key, translation)
+            self._stats["writes"] += 1
+        if self.sqlite_path:
+            try:
+                with closing(self._connect()) as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO translations (source_lang, target_lang, text_hash, translation, created) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        key + (translation, time.time())
+                    )
+            except sqlite3.Error as e:
+                # The in-memory entry still serves this worker; only sharing is lost
+                log.warning("Translation cache write failed",
+                            extra={"error": str(e), "sample_key": "cache_write_failed"})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["sqlite_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_default_cache: Optional[TranslationCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_translation_cache() -> TranslationCache:
+    """Process-wide cache; TRANSLATION_CACHE_DB sets the shared SQLite file ("" keeps it in memory only)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TranslationCache(
+                sqlite_path=os.getenv("TRANSLATION_CACHE_DB", "translation_cache.db") or None,
+                max_entries=int(os.getenv("TRANSLATION_CACHE_SIZE", 10000))
+            )
+        return _default_cache
@@ -0,0 +1,208 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from typing import Any, Callable, Dict, List, Optional
+
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from llm_scheduler import RateLimitScheduler, current_priority
+from metrics import PoolTracker
+
+
+class TranslationError(Exception):
+    """A translation provider request failed."""
+
+
+class TranslationThrottled(TranslationError):
+    """The provider rejected a request for rate limiting; it is worth retrying after a pause."""
+
+
+class TranslationCancelled(TranslationError):
+    """The job group a request belonged to was cancelled before it ran."""
+
+
+class TranslationJobGroup:
+    """The provider requests for one document. They can be cancelled together, and results()
+    returns them in submission order regardless of completion order."""
+
+    def __init__(self):
+        self._futures: List[Future] = []
+        self._cancelled = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._futures)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Drop queued requests and stop running ones before their next attempt."""
+        self._cancelled.set()
+        for future in self._futures:
+            future.cancel()
+
+    def results(self, timeout: float = None, return_exceptions: bool = False, start: int = 0) -> List[Any]:
+        """Wait for the requests from index start on; the group is cancelled if timeout expires first.
+
+        timeout bounds the wait for the whole group, not each request. With return_exceptions,
+        a failed request yields its exception (of any type) in place of a result; otherwise the
+        first failure (in order) is raised.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        results = []
+        try:
+            for future in self._futures[start:]:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    results.append(future.result(timeout=remaining))
+                except CancelledError:
+                    error = TranslationCancelled("Translation job group was cancelled")
+                    if not return_exceptions:
+                        raise error
+                    results.append(error)
+                except TimeoutError:
+                    raise
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    results.append(e)
+        except TimeoutError:
+            self.cancel()
+            raise
+        return results
+
+
+class PriorityWorkerPool:
+    """Worker threads that take queued work lowest priority value first, FIFO within a priority.
+
+    Unlike ThreadPoolExecutor's FIFO queue, an INTERACTIVE job submitted behind queued BATCH
+    jobs is picked up by the next free worker.
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "worker"):
+        self.max_workers = max(1, max_workers)
+        self.thread_name_prefix = thread_name_prefix
+        self._queue: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+    def submit(self, priority: int, fn: Callable, *args) -> Future:
+        future = Future()
+        with self._condition:
+            heapq.heappush(self._queue, (priority, next(self._sequence), future, fn, args))
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._work, daemon=True,
+                                          name=f"{self.thread_name_prefix}_{len(self._threads)}")
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify()
+        return future
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                _, _, future, fn, args = heapq.heappop(self._queue)
+            # Skips futures cancelled while queued
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = fn(*args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+
+class TranslationExecutor:
+    """Bounded worker pool shared by every translation caller in the process.
+
+    Each provider gets its own RateLimitScheduler, counting requests and characters per
+    minute, so one slow or strict provider cannot starve another. Throttled requests are
+    retried with jittered exponential backoff after pausing that provider's scheduler. Queued
+    requests reach the workers in scheduler priority order, so background (BATCH) translation
+    never holds a worker an interactive request is waiting for.
+    """
+
+    def __init__(self, max_workers: int = 8, max_attempts: int = 5, initial_wait: float = 1.0, max_wait: float = 30.0):
+        self.max_workers = max(1, max_workers)
+        self.max_attempts = max_attempts
+        self.initial_wait = initial_wait
+        self.max_wait = max_wait
+        self._pool = PriorityWorkerPool(self.max_workers, thread_name_prefix="translate")
+        self._tracker = PoolTracker("translation", self.max_workers)
+        # The pool lives as long as the process, so its capacity is counted once and never released
+        self._tracker.__enter__()
+        self._limiters: Dict[str, RateLimitScheduler] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, provider: str, requests_per_minute: int = 600,
+                characters_per_minute: int = 1000000) -> RateLimitScheduler:
+        """The provider's scheduler; the limits only apply when it is first created."""
+        with self._lock:
+            if provider not in self._limiters:
+                self._limiters[provider] = RateLimitScheduler(requests_per_minute, characters_per_minute)
+            return self._limiters[provider]
+
+    def submit_group(self, limiter: RateLimitScheduler, fn: Callable[[List[str]], List[str]],
+                     batches: List[List[str]], group: TranslationJobGroup = None) -> TranslationJobGroup:
+        """Queue fn(batch) for every batch under limiter. Pass a group to add to an existing one."""
+        if group is None:
+            group = TranslationJobGroup()
+        priority = current_priority()
+        for batch in batches:
+            self._tracker.submitted()
+            group._futures.append(self._pool.submit(priority, self._tracker.run, self._run, group, limiter, fn, batch,
+                                                    priority))
+        return group
+
+    def _run(self, group: TranslationJobGroup, limiter: RateLimitScheduler, fn: Callable[[List[str]], List[str]],
+             batch: List[str], priority: int) -> List[str]:
+        characters = sum(len(text) for text in batch)
+
+        def attempt():
+            if group.cancelled:
+                raise TranslationCancelled("Translation job group was cancelled")
+            limiter.acquire(characters, priority)
+            try:
+                return fn(batch)
+            except TranslationThrottled:
+                limiter.on_rate_limited(None)
+                raise
+
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=self.initial_wait, max=self.max_wait),
+            retry=retry_if_exception_type(TranslationThrottled),
+            reraise=True
+        )
+        return retrying(attempt)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = dict(self._limiters)
+        return {"max_workers": self.max_workers,
+                "providers": {provider: limiter.stats() for provider, limiter in limiters.items()}}
+
+
+_default_executor: Optional[TranslationExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def get_default_translation_executor() -> TranslationExecutor:
+    """Process-wide translation pool; TRANSLATION_MAX_WORKERS sizes it."""
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = TranslationExecutor(max_workers=int(os.getenv("TRANSLATION_MAX_WORKERS", 8)))
+        return _default_executor
@@ -0,0 +1,113 @@
+from typing import Dict, Any, FrozenSet, Set, Tuple
+
+# Translation schemas for the artifacts DRIForesightProcessor produces. A schema mirrors the
+# artifact's JSON shape and marks what may be sent to a translation provider:
+#   TEXT        - every string in the subtree is prose and gets translated
+#   VOCABULARY  - a fixed, machine-readable value; it is kept verbatim and its display label
+#                 comes from the shared vocabulary lookup table instead
+#   {key: ...}  - only the listed keys are visited; "*" covers any key not listed
+#   [spec]      - spec applies to every list item
+#   AUTO        - no schema known: every string is prose except under UNTRANSLATED_KEYS, and
+#                 fixed-vocabulary values under VOCABULARY_KEYS are kept as VOCABULARY
+# Anything the schema does not mention (ids, timeframes, scores) is left untouched.
+
+TEXT = "text"
+VOCABULARY = "vocabulary"
+AUTO = "auto"
+
+# Values the prompts ask the model to pick from; translated once per language pair and reused
+FIXED_VOCABULARY: Tuple[str, ...] = (
+    "High", "Medium", "Low",
+    "Strong", "Weak",
+    "Collapse", "Collapse/Decline", "New Equilibrium", "Transformation",
+    "Baseline", "Continuation", "Baseline/Continuation",
+    "Dominant", "Emerging", "Alternative",
+    "Social", "Technological", "Economic", "Environmental", "Political", "Values"
+)
+
+_SIGNAL = {"title": TEXT, "description": TEXT, "source": TEXT, "impact": TEXT, "potential": TEXT,
+           "evidence_strength": TEXT}
+
+_OUTCOME = {"archetype": VOCABULARY, "outcome_text": TEXT, "key_impacts": TEXT, "resolution_direction": TEXT,
+            "narrative_shift": TEXT}
+
+_SCENARIO = {
+    "scenario_title": TEXT,
+    "archetype": VOCABULARY,
+    "scenario_text": TEXT,
+    "key_factors": TEXT,
+    "critical_assumptions": TEXT,
+    # "Low/Medium/High - <justification>": free text, so translated as prose
+    "probability_assessment": TEXT,
+    "key_indicators": TEXT
+}
+
+_WIND_TUNNEL_SCENARIO = {"viability": TEXT, "process": TEXT, "capabilities": TEXT, "adaptations_needed": TEXT}
+
+TRANSLATION_SCHEMAS: Dict[str, Any] = {
+    "domain_map": {
+        "central_domain": TEXT,
+        "description": TEXT,
+        "sub_domains": [{"name": TEXT, "description": TEXT, "relevance": VOCABULARY, "issue_areas": TEXT}]
+    },
+    "signals": {"strong_signals": [_SIGNAL], "weak_signals": [_SIGNAL]},
+    "steepv": TEXT,
+    "ai_suggestions": {
+        "suggestions": [{"title": TEXT, "description": TEXT, "category": VOCABULARY, "rationale": TEXT}]
+    },
+    "futures_triangle": TEXT,
+    "interview_analysis": TEXT,
+    "futures_triangle_2_0": {
+        "drivers": [{
+            "name": TEXT, "description": TEXT, "category": VOCABULARY, "impact_level": VOCABULARY,
+            "certainty": VOCABULARY, "current_trajectory": TEXT, "source_evidence": TEXT
+        }],
+        "uncertainties": [{
+            "name": TEXT, "description": TEXT, "key_variables": TEXT, "possible_outcomes": TEXT,
+            "impact_on_scenarios": TEXT, "source_evidence": TEXT
+        }],
+        "narratives": [{
+            "type": VOCABULARY, "name": TEXT, "description": TEXT, "supporting_evidence": TEXT,
+            "influence_areas": TEXT, "alternative_versions": TEXT, "source_context": TEXT
+        }],
+        "enhanced_triangle": TEXT,
+        "strategic_insights": TEXT
+    },
+    "baseline_scenario": {
+        "scenario_title": TEXT,
+        "scenario_text": TEXT,
+        "key_assumptions": TEXT,
+        "dominant_drivers": TEXT,
+        "scenario_type": VOCABULARY
+    },
+    "driver_outcomes": {
+        "driver_outcomes": [{"driver_name": TEXT, "baseline_trajectory": TEXT, "outcomes": [_OUTCOME]}],
+        "uncertainty_outcomes": [{"uncertainty_name": TEXT, "key_variables": TEXT, "outcomes": [_OUTCOME]}],
+        "narrative_outcomes": [{"narrative_name": TEXT, "narrative_type": VOCABULARY, "outcomes": [_OUTCOME]}],
+        "cross_archetype_insights": TEXT
+    },
+    "scenario": _SCENARIO,
+    "alternative_scenarios": {"scenarios": [_SCENARIO]},
+    "wind_tunnel": {"scenarios": {"*": _WIND_TUNNEL_SCENARIO}, "cross_scenario": TEXT}
+}
+
+
+def _vocabulary_keys(spec: Any, keys: Set[str]) -> Set[str]:
+    if isinstance(spec, dict):
+        for key, child in spec.items():
+            if child == VOCABULARY:
+                keys.add(key)
+            _vocabulary_keys(child, keys)
+    elif isinstance(spec, list):
+        _vocabulary_keys(spec[0], keys)
+    return keys
+
+
+# Used by AUTO for documents translated without an artifact name
+VOCABULARY_KEYS: FrozenSet[str] = frozenset(_vocabulary_keys(TRANSLATION_SCHEMAS, set()))
+UNTRANSLATED_KEYS: FrozenSet[str] = frozenset({"id", "timeframe"})
+
+
+def is_untranslated_key(key: str) -> bool:
+    """Identifiers ("id", "driver_id", ...) and timeframes are never sent for translation."""
+    return key in UNTRANSLATED_KEYS or key.endswith("_id")
@@ -195,15 +195,109 @@
 
 import json
 import os
+import random
+import re
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Union
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Set, Tuple, Union
+
+from translation_cache import TranslationCache, get_default_translation_cache
+from translation_executor import (TranslationError, TranslationExecutor, TranslationJobGroup, TranslationThrottled,
+                                  get_default_translation_executor)
+from translation_schemas import (AUTO, FIXED_VOCABULARY, TEXT, TRANSLATION_SCHEMAS, VOCABULARY, VOCABULARY_KEYS,
+                                  is_untranslated_key)
+from structured_logging import get_logger
+
+log = get_logger("translation")
+
+
+def is_throttling_error(exc: BaseException) -> bool:
+    """Provider rate-limit rejections: HTTP 429 / RESOURCE_EXHAUSTED or deep-translator's TooManyRequests."""
+    if type(exc).__name__ in ("TooManyRequests", "ResourceExhausted"):
+        return True
+    if getattr(exc, "code", None) == 429:
+        return True
+    message = str(exc).lower()
+    return "429" in message or "too many requests" in message
+
+
+_shared_clients: Dict[Tuple, Any] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def shared_client(key: Tuple, factory: Callable[[], Any]) -> Any:
+    """One provider client per key for the whole process, built on first use."""
+    with _shared_clients_lock:
+        if key not in _shared_clients:
+            _shared_clients[key] = factory()
+        return _shared_clients[key]
+
+
+class GoogleWebTranslateClient:
+    """Thread-safe client for the free translate.google.com endpoint that deep-translator scrapes.
+
+    deep-translator opens a new connection for every string (module-level requests.get) and its
+    translator objects mutate their own URL parameters, so they cannot be shared between threads.
+    This client keeps one pooled keep-alive session and holds no per-call state.
+    """
+
+    def __init__(self, base_url: str = None, pool_size: int = 16, timeout: float = 30.0):
+        import requests
+        from bs4 import BeautifulSoup
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url or os.getenv("GOOGLE_TRANSLATE_URL", "https://translate.google.com/m")
+        self.timeout = timeout
+        self._BeautifulSoup = BeautifulSoup
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def translate(self, text: str, source_lang: str, target_lang: str) -> str:
+        text = text.strip()
+        if not text or source_lang == target_lang:
+            return text
+        try:
+            response = self.session.get(self.base_url, params={"sl": source_lang, "tl": target_lang, "q": text},
+                                        timeout=self.timeout)
+        except Exception as e:
+            raise TranslationError(f"Google Translate request failed: {e}") from e
+        if response.status_code == 429:
+            raise TranslationThrottled("Google Translate returned 429 Too Many Requests")
+        if response.status_code != 200:
+            raise TranslationError(f"Google Translate returned HTTP {response.status_code}")
+        soup = self._BeautifulSoup(response.text, "html.parser")
+        element = soup.find("div", {"class": "t0"}) or soup.find("div", {"class": "result-container"})
+        if element is None:
+            raise TranslationError("No translation found in the Google Translate response")
+        return element.get_text(strip=True)
+
 
 class TranslationService(ABC):
     """Abstract base class for translation services"""
+
+    # Rate-limit bucket name and quota shared by every instance of the provider
+    provider = "default"
+    requests_per_minute = 600
+    characters_per_minute = 1000000
+    # How many strings, and how many characters in total, one provider request may carry
+    max_batch_size = 1
+    max_batch_chars = 5000
     
     @abstractmethod
     def translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
         pass
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        """Translate a chunk packed to this provider's limits; one request per string by default.
+
+        Unlike translate_text, implementations raise TranslationError on failure
+        (TranslationThrottled when rate limited) so the executor can retry or report it.
+        """
+        return [self.translate_text(text, source_lang, target_lang) for text in texts]
     
     def translate_to_lao(self, text: str) -> str:
         return self.translate_text(text, 'en', 'lo')
@@ -214,82 +308,354 @@ class TranslationService(ABC):
 class FreeGoogleTranslator(TranslationService):
     """Free Google Translate via deep-translator"""
 
+    provider = "google_free"
+    requests_per_minute = 300
+    characters_per_minute = 500000
+
     def __init__(self):
         try:
-            from deep_translator import GoogleTranslator
-            self.GoogleTranslator = GoogleTranslator
+            # Shared by every TranslationManager (and so /api/translate) in the process
+            self.client = shared_client(("google_free",), lambda: GoogleWebTranslateClient(
+                pool_size=int(os.getenv("TRANSLATION_MAX_WORKERS", 8))
+            ))
             self.available = True
         except ImportError:
-            print("Warning: deep-translator not installed. Install with: pip install deep-translator")
+            log.warning("deep-translator not installed. Install with: pip install deep-translator")
             self.available = False
 
     def translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
-        if not self.available or not text or not text.strip():
-            return text
-        
         try:
-            # Create translator instance with dynamic languages
-            translator = self.GoogleTranslator(source=source_lang, target=target_lang)
-            return translator.translate(text)
-        except Exception as e:
-            print(f"Free translation error: {e}")
+            return self.translate_batch([text], source_lang, target_lang)[0]
+        except TranslationError as e:
+            log.warning("Free translation failed", extra={"error": str(e), "sample_key": "free_translation_error"})
             return text
 
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        if not self.available:
+            return list(texts)
+
+        results = []
+        for text in texts:
+            if not text or not text.strip():
+                results.append(text)
+                continue
+            results.append(self.client.translate(text, source_lang, target_lang))
+        return results
+
 class GoogleCloudTranslator(TranslationService):
     """Official Google Cloud Translation API implementation"""
+
+    provider = "google_cloud"
+    requests_per_minute = 600
+    characters_per_minute = 6000000
+    # translate_v2 accepts up to 128 segments per request; stay well under its request size cap
+    max_batch_size = 128
+    max_batch_chars = 25000
     
     def __init__(self, credentials_path: str = None):
         try:
             from google.cloud import translate_v2 as translate
             
-            if credentials_path:
-                os.environ['GOOGLE_APPLICATION_CREDENTIALS'] = credentials_path
-            
-            self.translate_client = translate.Client()
+            # Built once per credentials file; the client's authorized session keeps connections alive
+            self.translate_client = shared_client(("google_cloud", credentials_path), lambda: (
+                translate.Client.from_service_account_json(credentials_path) if credentials_path
+                else translate.Client()
+            ))
             self.available = True
         except ImportError:
-            print("Warning: google-cloud-translate not installed. Install with: pip install google-cloud-translate")
+            log.warning("google-cloud-translate not installed. Install with: pip install google-cloud-translate")
             self.available = False
         except Exception as e:
-            print(f"Google Cloud setup error: {e}")
+            log.error("Google Cloud setup failed", extra={"error": str(e)})
             self.available = False
     
     def translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
-        if not self.available:
+        if not text or not text.strip():
             return text
-        
         try:
-            if not text or not text.strip():
-                return text
-            
-            result = self.translate_client.translate(
-                text,
+            return self.translate_batch([text], source_lang, target_lang)[0]
+        except TranslationError as e:
+            log.warning("Google Cloud translation failed",
+                        extra={"error": str(e), "sample_key": "cloud_translation_error"})
+            return text
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        if not self.available:
+            return list(texts)
+
+        try:
+            results = self.translate_client.translate(
+                list(texts),
                 source_language=source_lang,
                 target_language=target_lang
             )
-            return result['translatedText']
+            return [result['translatedText'] for result in results]
         except Exception as e:
-            print(f"Google Cloud translation error: {e}")
+            if is_throttling_error(e):
+                raise TranslationThrottled(str(e)) from e
+            raise TranslationError(str(e)) from e
+
+
+class OfflineTranslator(TranslationService):
+    """Deterministic stand-in provider for tests and benchmarks without network access.
+
+    Words found in dictionary are replaced by their entry; everything else is pseudo-translated
+    by accenting its vowels, so output differs from the input but keeps its length and spacing.
+    latency (seconds per request), max_chars (per text, rejected beyond it like a real provider),
+    max_batch_size and throttle_rate (fraction of requests answered as rate limited) shape it
+    like the service being modelled.
+    """
+
+    provider = "offline"
+    requests_per_minute = 100000
+    characters_per_minute = 100000000
+    _PSEUDO = str.maketrans("aeiouyAEIOUY", "àéîöûÿÀÉÎÖÛŸ")
+
+    def __init__(self, latency: float = 0.0, max_chars: int = 5000, max_batch_size: int = 16,
+                 dictionary: Dict[str, str] = None, throttle_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.max_batch_chars = max_chars
+        self.max_batch_size = max_batch_size
+        self.dictionary = {word.lower(): translation for word, translation in (dictionary or {}).items()}
+        self.throttle_rate = throttle_rate
+        self.available = True
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "texts": 0, "characters": 0, "throttled": 0}
+
+    @classmethod
+    def from_env(cls) -> "OfflineTranslator":
+        """Configured by TRANSLATION_OFFLINE_LATENCY_MS, _MAX_CHARS, _BATCH_SIZE, _THROTTLE_RATE
+        and _DICTIONARY (path to a JSON word list)."""
+        dictionary = None
+        path = os.getenv("TRANSLATION_OFFLINE_DICTIONARY")
+        if path:
+            with open(path, encoding="utf-8") as f:
+                dictionary = json.load(f)
+        return cls(
+            latency=float(os.getenv("TRANSLATION_OFFLINE_LATENCY_MS", "0")) / 1000,
+            max_chars=int(os.getenv("TRANSLATION_OFFLINE_MAX_CHARS", 5000)),
+            max_batch_size=int(os.getenv("TRANSLATION_OFFLINE_BATCH_SIZE", 16)),
+            dictionary=dictionary,
+            throttle_rate=float(os.getenv("TRANSLATION_OFFLINE_THROTTLE_RATE", "0"))
+        )
+
+    def _translate_word(self, match: "re.Match") -> str:
+        word = match.group(0)
+        return self.dictionary.get(word.lower(), word.translate(self._PSEUDO))
+
+    def translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
+        try:
+            return self.translate_batch([text], source_lang, target_lang)[0]
+        except TranslationError as e:
+            log.warning("Offline translation failed",
+                        extra={"error": str(e), "sample_key": "offline_translation_error"})
             return text
 
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str) -> List[str]:
+        with self._lock:
+            self._stats["requests"] += 1
+            throttled = self.throttle_rate and self._random.random() < self.throttle_rate
+            if throttled:
+                self._stats["throttled"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            raise TranslationThrottled("Offline provider simulated a rate limit")
+        for text in texts:
+            if len(text) > self.max_batch_chars:
+                raise TranslationError(
+                    f"Text of {len(text)} characters exceeds the {self.max_batch_chars} character limit"
+                )
+        with self._lock:
+            self._stats["texts"] += len(texts)
+            self._stats["characters"] += sum(len(text) for text in texts)
+        if source_lang == target_lang:
+            return list(texts)
+        return [re.sub(r"\w+", self._translate_word, text) for text in texts]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+def pack_batches(texts: List[str], max_size: int, max_chars: int) -> List[List[str]]:
+    """Group texts into chunks of at most max_size strings and max_chars characters.
+
+    A single text longer than max_chars gets a chunk of its own.
+    """
+    batches, current, current_chars = [], [], 0
+    for text in texts:
+        if current and (len(current) >= max_size or current_chars + len(text) > max_chars):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(text)
+        current_chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+# Sentence ends (followed by whitespace) and line breaks; the separator itself is kept
+_SEGMENT_BOUNDARY = re.compile(r'(\n+|(?<=[.!?\u0e2f])\s+)')
+_ABBREVIATIONS = {"e.g.", "i.e.", "etc.", "vs.", "approx.", "dr.", "mr.", "mrs.", "ms.", "st.", "no.", "u.s.", "u.k."}
+
+
+def split_segments(text: str) -> List[Tuple[str, str]]:
+    """Split text into (sentence, following separator) pairs; joining them gives back text."""
+    parts = _SEGMENT_BOUNDARY.split(text)
+    segments = []
+    for segment, separator in zip(parts[0::2], parts[1::2] + [""]):
+        previous = segments[-1] if segments else None
+        # "e.g. the" is not a sentence end; glue the pieces back together
+        if previous and "\n" not in previous[1] and previous[0].rsplit(" ", 1)[-1].lower() in _ABBREVIATIONS:
+            segments[-1] = (previous[0] + previous[1] + segment, separator)
+        else:
+            segments.append((segment, separator))
+    return segments
+
+
+def chunk_text(text: str, max_chars: int) -> List[Tuple[str, str]]:
+    """Split text into (chunk, following separator) pairs of at most max_chars characters each.
+
+    Chunks end on sentence boundaries where possible and never span a line break, so paragraph
+    separators stay outside the translated chunks. Overlong sentences fall back to word
+    boundaries and finally to a hard cut.
+    """
+    pieces = []
+    for segment, separator in split_segments(text):
+        if len(segment) > max_chars:
+            parts = re.split(r'(\s+)', segment)
+            for word, space in zip(parts[0::2], parts[1::2] + [""]):
+                while len(word) > max_chars:
+                    pieces.append((word[:max_chars], ""))
+                    word = word[max_chars:]
+                pieces.append((word, space))
+            pieces[-1] = (pieces[-1][0], pieces[-1][1] + separator)
+        else:
+            pieces.append((segment, separator))
+
+    chunks = []
+    for piece, separator in pieces:
+        previous = chunks[-1] if chunks else None
+        if previous and "\n" not in previous[1] and len(previous[0]) + len(previous[1]) + len(piece) <= max_chars:
+            chunks[-1] = (previous[0] + previous[1] + piece, separator)
+        else:
+            chunks.append((piece, separator))
+    return chunks
+
+
+def collect_strings(obj: Any, strings: List[str]) -> List[str]:
+    """Append every non-blank string leaf of a JSON structure to strings, in document order."""
+    if isinstance(obj, dict):
+        for value in obj.values():
+            collect_strings(value, strings)
+    elif isinstance(obj, list):
+        for item in obj:
+            collect_strings(item, strings)
+    elif isinstance(obj, str) and obj.strip():
+        strings.append(obj)
+    return strings
+
+
+def replace_strings(obj: Any, translations: Dict[str, str]) -> Any:
+    """Rebuild a JSON structure with its string leaves swapped for their translations."""
+    if isinstance(obj, dict):
+        return {key: replace_strings(value, translations) for key, value in obj.items()}
+    elif isinstance(obj, list):
+        return [replace_strings(item, translations) for item in obj]
+    elif isinstance(obj, str):
+        return translations.get(obj, obj)
+    return obj
+
+
+def _child_spec(spec: Dict[str, Any], key: str) -> Any:
+    return spec[key] if key in spec else spec.get("*")
+
+
+def _auto_child_spec(key: str, value: Any) -> Any:
+    if is_untranslated_key(key):
+        return None
+    if key in VOCABULARY_KEYS and value in FIXED_VOCABULARY:
+        return VOCABULARY
+    # Anything else under a vocabulary key (e.g. a free-text category) is still prose
+    return AUTO
+
+
+def collect_translatable(obj: Any, spec: Any, strings: List[str], vocabulary: Set[str]) -> List[str]:
+    """Schema-aware collect_strings: prose goes to strings, fixed-vocabulary values to vocabulary."""
+    if spec == TEXT or (spec == AUTO and isinstance(obj, str)):
+        collect_strings(obj, strings)
+    elif spec == VOCABULARY:
+        if isinstance(obj, str) and obj.strip():
+            vocabulary.add(obj)
+    elif spec == AUTO and isinstance(obj, dict):
+        for key, value in obj.items():
+            collect_translatable(value, _auto_child_spec(key, value), strings, vocabulary)
+    elif spec == AUTO and isinstance(obj, list):
+        for item in obj:
+            collect_translatable(item, AUTO, strings, vocabulary)
+    elif isinstance(spec, dict) and isinstance(obj, dict):
+        for key, value in obj.items():
+            collect_translatable(value, _child_spec(spec, key), strings, vocabulary)
+    elif isinstance(spec, list) and isinstance(obj, list):
+        for item in obj:
+            collect_translatable(item, spec[0], strings, vocabulary)
+    return strings
+
+
+def apply_translations(obj: Any, spec: Any, translations: Dict[str, str]) -> Any:
+    """Schema-aware replace_strings; values outside TEXT subtrees come back unchanged."""
+    if spec == TEXT or (spec == AUTO and isinstance(obj, str)):
+        return replace_strings(obj, translations)
+    elif spec == AUTO and isinstance(obj, dict):
+        return {key: apply_translations(value, _auto_child_spec(key, value), translations)
+                for key, value in obj.items()}
+    elif spec == AUTO and isinstance(obj, list):
+        return [apply_translations(item, AUTO, translations) for item in obj]
+    elif isinstance(spec, dict) and isinstance(obj, dict):
+        return {key: apply_translations(value, _child_spec(spec, key), translations) for key, value in obj.items()}
+    elif isinstance(spec, list) and isinstance(obj, list):
+        return [apply_translations(item, spec[0], translations) for item in obj]
+    return obj
+
 class TranslationManager:
     """Manager class that handles translation service selection and JSON processing"""
     
-    def __init__(self, service_type: str = "free", **kwargs):
+    def __init__(self, service_type: str = "free", cache: TranslationCache = None,
+                 executor: TranslationExecutor = None, segment_sentences: bool = True,
+                 max_vocabulary_labels: int = 1000, **kwargs):
         """
         Initialize translation manager
         
         Args:
-            service_type: "free" or "google_cloud"
+            service_type: "free", "google_cloud" or "offline" (no network; see OfflineTranslator)
+            cache: translation memory; defaults to the process-wide one
+            executor: worker pool and per-provider rate limits; defaults to the process-wide one
+            segment_sentences: translate and cache sentence by sentence, so editing one
+                sentence of a narrative only re-translates that sentence
+            max_vocabulary_labels: labels kept per language pair in the vocabulary table;
+                FIXED_VOCABULARY is always kept, other values are evicted oldest first
             **kwargs: Additional parameters for specific services
         """
         self.current_language = 'en'
+        self.cache = cache or get_default_translation_cache()
+        self.executor = executor or get_default_translation_executor()
+        self.segment_sentences = segment_sentences
+        # Fixed-vocabulary display labels per (source, target) pair, shared by every artifact
+        self._vocabulary_labels: Dict[Tuple[str, str], "OrderedDict[str, str]"] = {}
+        self.max_vocabulary_labels = max(len(FIXED_VOCABULARY), max_vocabulary_labels)
+        self._vocabulary_lock = threading.Lock()
         
         if service_type == "free":
             self.service = FreeGoogleTranslator()
         elif service_type == "google_cloud":
             credentials_path = kwargs.get('credentials_path')
             self.service = GoogleCloudTranslator(credentials_path)
+        elif service_type == "offline":
+            options = {key: kwargs[key] for key in ("latency", "max_chars", "max_batch_size", "dictionary",
+                                                    "throttle_rate", "seed") if key in kwargs}
+            self.service = OfflineTranslator(**options) if options else OfflineTranslator.from_env()
         else:
             raise ValueError(f"Unknown service type: {service_type}")
     
@@ -304,9 +670,9 @@ class TranslationManager:
                     translated = self._translate_json_structure(json_data, 'lo')
                     return json.dumps(translated, ensure_ascii=False, indent=2)
                 except:
-                    return self.service.translate_to_lao(content)
+                    return self._translate_text(content, 'en', 'lo')
             else:
-                return self.service.translate_to_lao(content)
+                return self._translate_text(content, 'en', 'lo')
         return content
     
     def translate_to_english(self, content: Union[str, Dict]) -> Union[str, Dict]:
@@ -320,24 +686,183 @@ class TranslationManager:
                     translated = self._translate_json_structure(json_data, 'en')
                     return json.dumps(translated, ensure_ascii=False, indent=2)
                 except:
-                    return self.service.translate_to_english(content)
+                    return self._translate_text(content, 'lo', 'en')
             else:
-                return self.service.translate_to_english(content)
+                return self._translate_text(content, 'lo', 'en')
         return content
     
     def _translate_json_structure(self, obj: Any, target_lang: str) -> Any:
-        """Recursively translate JSON structure while preserving format"""
-        if isinstance(obj, dict):
-            return {key: self._translate_json_structure(value, target_lang) for key, value in obj.items()}
-        elif isinstance(obj, list):
-            return [self._translate_json_structure(item, target_lang) for item in obj]
-        elif isinstance(obj, str) and obj.strip():
-            if target_lang == 'lo':
-                return self.service.translate_to_lao(obj)
+        """Translate every string in a JSON structure in one batch while preserving format"""
+        source_lang = 'en' if target_lang == 'lo' else 'lo'
+        return self.translate_document(obj, source_lang, target_lang)
+
+    def translate_document(self, obj: Any, source_lang: str, target_lang: str, strict: bool = False,
+                           group: TranslationJobGroup = None, timeout: float = None, artifact: str = None) -> Any:
+        """Translate the string leaves of a JSON structure with one deduplicated batch.
+
+        With an artifact name from TRANSLATION_SCHEMAS only the fields its schema marks as
+        translatable are sent; enum-like values (archetype, timeframe, ...) stay as generated.
+        Without one, ids, timeframes and known fixed-vocabulary values are still skipped.
+        """
+        spec = self.translation_schema(artifact)
+        strings = collect_translatable(obj, spec, [], set())
+        translated = self.translate_batch(strings, source_lang, target_lang, strict, group, timeout)
+        return apply_translations(obj, spec, dict(zip(strings, translated)))
+
+    @staticmethod
+    def translation_schema(artifact: str = None) -> Any:
+        if artifact is None:
+            return AUTO
+        if artifact not in TRANSLATION_SCHEMAS:
+            raise ValueError(f"Unknown translation schema: {artifact}")
+        return TRANSLATION_SCHEMAS[artifact]
+
+    def vocabulary_labels(self, source_lang: str, target_lang: str, values: List[str] = ()) -> Dict[str, str]:
+        """Display labels for values (all of FIXED_VOCABULARY by default) from the shared lookup table.
+
+        The whole fixed vocabulary is translated once per language pair on first use, so later
+        calls are dictionary reads.
+        """
+        key = (source_lang, target_lang)
+        wanted = list(values or FIXED_VOCABULARY)
+        with self._vocabulary_lock:
+            table = self._vocabulary_labels.setdefault(key, OrderedDict())
+            labels = {value: table[value] for value in wanted if value in table}
+            for value in labels:
+                table.move_to_end(value)
+            missing = [value for value in dict.fromkeys(FIXED_VOCABULARY + tuple(wanted)) if value not in table]
+        if missing:
+            try:
+                translated = dict(zip(missing, self.translate_batch(missing, source_lang, target_lang, strict=True)))
+            except Exception as e:
+                # Fall back to the source values for this call only; a failure is never stored as a label
+                log.warning("Vocabulary translation failed", extra={
+                    "provider": self.service.provider, "values": len(missing), "error": str(e),
+                    "sample_key": "vocabulary_translation_failed"
+                })
+                labels.update((value, value) for value in missing)
             else:
-                return self.service.translate_to_english(obj)
-        else:
-            return obj
+                labels.update(translated)
+                with self._vocabulary_lock:
+                    table.update(translated)
+                    self._trim_vocabulary(table)
+        return {value: labels[value] for value in wanted}
+
+    def _trim_vocabulary(self, table: "OrderedDict[str, str]"):
+        # Caller holds self._vocabulary_lock
+        for value in list(table):
+            if len(table) <= self.max_vocabulary_labels:
+                break
+            if value not in FIXED_VOCABULARY:
+                del table[value]
+
+    def document_vocabulary(self, obj: Any, artifact: str) -> List[str]:
+        """The fixed-vocabulary values an artifact actually contains."""
+        vocabulary = set()
+        collect_translatable(obj, self.translation_schema(artifact), [], vocabulary)
+        return sorted(vocabulary)
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str, strict: bool = False,
+                        group: TranslationJobGroup = None, timeout: float = None,
+                        stats: Dict[str, int] = None) -> List[str]:
+        """Translate many strings, returned in input order.
+
+        Texts are split into sentences (unless segment_sentences is off) and every distinct
+        sentence is looked up in the cache; only the missing ones go to translate_uncached.
+        Pass a dict as stats to receive segment and cached_segment counts.
+        """
+        segmented = {}
+        for text in dict.fromkeys(texts):
+            if not isinstance(text, str) or not text.strip():
+                segmented[text] = [(text, "")]
+            else:
+                segmented[text] = split_segments(text) if self.segment_sentences else [(text, "")]
+
+        translations: Dict[str, str] = {}
+        pending = []
+        for segments in segmented.values():
+            for segment, _ in segments:
+                if segment in translations or not isinstance(segment, str) or not segment.strip():
+                    continue
+                cached = self.cache.get(source_lang, target_lang, segment)
+                translations[segment] = cached
+                if cached is None:
+                    pending.append(segment)
+
+        if stats is not None:
+            stats["segments"] = len(translations)
+            stats["cached_segments"] = len(translations) - len(pending)
+        translations.update(zip(pending, self.translate_uncached(pending, source_lang, target_lang, strict, group, timeout)))
+        assembled = {
+            text: "".join(translations.get(segment, segment) + separator for segment, separator in segments)
+            if isinstance(text, str) else text
+            for text, segments in segmented.items()
+        }
+        return [assembled[text] for text in texts]
+
+    def translate_uncached(self, texts: List[str], source_lang: str, target_lang: str, strict: bool = False,
+                           group: TranslationJobGroup = None, timeout: float = None) -> List[str]:
+        """Send distinct texts to the provider and remember the results.
+
+        Texts over the provider's character limit are split with chunk_text and reassembled
+        afterwards. Everything is packed into provider-sized batches and run as one job group on
+        the shared executor, so the chunks of a long text translate in parallel; pass a group to
+        be able to cancel it. Failed batches raise with strict, otherwise their texts come back
+        untranslated, as translate_text does.
+        """
+        limit = self.service.max_batch_chars
+        chunked = {text: chunk_text(text, limit) for text in texts if len(text) > limit}
+        units = []
+        for text in texts:
+            if text in chunked:
+                units.extend(chunk for chunk, _ in chunked[text])
+            else:
+                units.append(text)
+
+        batches = pack_batches(units, self.service.max_batch_size, limit)
+        if not batches:
+            return []
+        limiter = self.executor.limiter(self.service.provider, self.service.requests_per_minute,
+                                        self.service.characters_per_minute)
+        if group is None:
+            group = TranslationJobGroup()
+        start = len(group)
+        self.executor.submit_group(
+            limiter, lambda batch: self.service.translate_batch(batch, source_lang, target_lang), batches, group
+        )
+        results = group.results(timeout=timeout, return_exceptions=not strict, start=start)
+
+        unit_translations: Dict[str, str] = {}
+        failed = set()
+        for batch, result in zip(batches, results):
+            if isinstance(result, BaseException) or not isinstance(result, list) or len(result) != len(batch):
+                # Any provider failure (or a malformed answer) leaves the batch untranslated
+                log.warning("Translation batch failed", extra={
+                    "provider": self.service.provider, "texts": len(batch),
+                    "error": str(result) if isinstance(result, BaseException) else "unexpected result count",
+                    "sample_key": "translation_batch_failed"
+                })
+                failed.update(batch)
+                result = batch
+            unit_translations.update(zip(batch, result))
+
+        translated = []
+        for text in texts:
+            if text in chunked:
+                translation = "".join(unit_translations[chunk] + separator for chunk, separator in chunked[text])
+                complete = not any(chunk in failed for chunk, _ in chunked[text])
+            else:
+                translation = unit_translations[text]
+                complete = text not in failed
+            # Never remember an untranslated echo (or a partly translated text) as a translation
+            if complete and translation and translation != text:
+                self.cache.put(source_lang, target_lang, text, translation)
+            translated.append(translation)
+        return translated
+
+    def _translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
+        """Translate one string through the translation cache and executor"""
+        return self.translate_batch([text], source_lang, target_lang)[0]
 
 # Usage Examples:
 